@@ -1,12 +1,17 @@
+import asyncio
 import base64
 import json
+import logging
 import uuid
 import sys
 import os
 COMMON_DIR_PARENT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
 if COMMON_DIR_PARENT not in sys.path:
     sys.path.append(COMMON_DIR_PARENT)
+import httpx
+
 from common.client import A2ACardResolver
+from common.utils.disk_cache import DiskCache
 from common.types import (
     AgentCard,
     DataPart,
@@ -25,32 +30,143 @@ from google.genai import types
 from google.adk.planners import BuiltInPlanner
 from google.genai.types import GenerateContentConfig, ThinkingConfig
 
+from .plan_executor import PlanExecutor, PlanNode
 from .remote_agent_connection import RemoteAgentConnections, TaskUpdateCallback
 
 
+logger = logging.getLogger(__name__)
+
+DEFAULT_CARD_CACHE_DIR = os.environ.get(
+    'A2A_CARD_CACHE_DIR', os.path.join('~', '.cache', 'a2a', 'agent_cards')
+)
+
+
 class HostAgent:
     """The host agent.
 
     This is the agent responsible for choosing which remote agents to send
     tasks to and coordinate their work.
+
+    Remote agent cards are resolved concurrently, each within
+    `discovery_timeout` seconds. Agents that cannot be reached at startup are
+    retried in the background every `rediscovery_interval` seconds and
+    registered once they come up.
+
+    Fetched cards are cached in `card_cache_dir`. On a restart the cached
+    cards are registered right away, and only refreshed in the background
+    with conditional GETs, so startup does not wait on the network at all.
+    Pass `card_cache_dir=None` to always fetch the cards.
+
+    `send_tasks_parallel` and `execute_plan` run at most `max_parallel_tasks`
+    remote tasks at once, and give up on (and cancel) those still running
+    after `parallel_tasks_timeout` seconds.
     """
 
     def __init__(
         self,
         remote_agent_addresses: list[str],
         task_callback: TaskUpdateCallback | None = None,
+        discovery_timeout: float = 5.0,
+        rediscovery_interval: float = 30.0,
+        card_cache_dir: str | None = DEFAULT_CARD_CACHE_DIR,
+        max_parallel_tasks: int = 4,
+        parallel_tasks_timeout: float = 600.0,
     ):
         self.task_callback = task_callback
         self.remote_agent_connections: dict[str, RemoteAgentConnections] = {}
         self.cards: dict[str, AgentCard] = {}
+        self.discovery_timeout = discovery_timeout
+        self.rediscovery_interval = rediscovery_interval
+        self.max_parallel_tasks = max_parallel_tasks
+        self.parallel_tasks_timeout = parallel_tasks_timeout
+        self.card_cache = DiskCache(card_cache_dir) if card_cache_dir else None
+        self.pending_addresses: list[str] = list(remote_agent_addresses)
+        self._discovery_task: asyncio.Task | None = None
+        # Closing the connections of agents that moved to another URL.
+        self._closing_connections: set[asyncio.Task] = set()
         self._update_agents_summary_for_prompt()
-        for address in remote_agent_addresses:
-            card_resolver = A2ACardResolver(address)
-            card = card_resolver.get_agent_card()
-            remote_connection = RemoteAgentConnections(card)
-            self.remote_agent_connections[card.name] = remote_connection
-            self.cards[card.name] = card
-        self._update_agents_summary_for_prompt()
+        uncached_addresses = [
+            address
+            for address in remote_agent_addresses
+            if not self._register_cached_card(address)
+        ]
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            asyncio.run(self.discover_agents(uncached_addresses))
+        else:
+            # Created from within an event loop, which must not be blocked.
+            self._ensure_discovery_task()
+
+    async def discover_agents(
+        self, addresses: list[str] | None = None
+    ) -> list[AgentCard]:
+        """Resolves the cards of pending agents concurrently.
+
+        Defaults to all pending agents. Returns the resolved cards;
+        unreachable agents stay pending.
+        """
+        if addresses is None:
+            addresses = list(self.pending_addresses)
+        if not addresses:
+            return []
+        async with httpx.AsyncClient() as client:
+            results = await asyncio.gather(
+                *(self._resolve_card(client, address) for address in addresses),
+                return_exceptions=True,
+            )
+        cards = []
+        for address, result in zip(addresses, results):
+            if isinstance(result, BaseException):
+                logger.warning(
+                    'Agent at %s is unreachable: %r', address, result
+                )
+                continue
+            self.pending_addresses.remove(address)
+            self.register_agent_card(result)
+            cards.append(result)
+        return cards
+
+    async def _resolve_card(
+        self, client: httpx.AsyncClient, address: str
+    ) -> AgentCard:
+        card_resolver = A2ACardResolver(
+            address, timeout=self.discovery_timeout, cache=self.card_cache
+        )
+        return await asyncio.wait_for(
+            card_resolver.aget_agent_card(client), self.discovery_timeout
+        )
+
+    def _register_cached_card(self, address: str) -> bool:
+        if self.card_cache is None:
+            return False
+        try:
+            card = A2ACardResolver(
+                address, cache=self.card_cache
+            ).get_cached_agent_card()
+        except ValueError as e:
+            logger.warning('Ignoring invalid cached card of %s: %s', address, e)
+            return False
+        if card is None:
+            return False
+        self.register_agent_card(card)
+        return True
+
+    def _ensure_discovery_task(self):
+        """Starts the background re-discovery of pending agents, if needed."""
+        if not self.pending_addresses:
+            return
+        if self._discovery_task and not self._discovery_task.done():
+            return
+        self._discovery_task = asyncio.get_running_loop().create_task(
+            self._rediscover_agents()
+        )
+
+    async def _rediscover_agents(self):
+        while self.pending_addresses:
+            await self.discover_agents()
+            if self.pending_addresses:
+                await asyncio.sleep(self.rediscovery_interval)
 
     def _update_agents_summary_for_prompt(self):
         agent_descriptions = []
@@ -74,11 +190,41 @@ class HostAgent:
         self.agents_summary_for_prompt = "\\n\\n".join(agent_descriptions)
 
     def register_agent_card(self, card: AgentCard):
-        remote_connection = RemoteAgentConnections(card)
-        self.remote_agent_connections[card.name] = remote_connection
+        if self.cards.get(card.name) == card:
+            # Keep the pooled connection of an unchanged, refreshed card.
+            return
+        remote_connection = self.remote_agent_connections.get(card.name)
+        if remote_connection is not None and remote_connection.card.url == card.url:
+            # Still the same agent server: keep its pooled connections.
+            remote_connection.card = card
+        else:
+            if remote_connection is not None:
+                self._close_in_background(remote_connection)
+            remote_connection = RemoteAgentConnections(card)
+            self.remote_agent_connections[card.name] = remote_connection
         self.cards[card.name] = card
         self._update_agents_summary_for_prompt()
 
+    def _close_in_background(self, remote_connection: RemoteAgentConnections):
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Its pool is created on first use, by a loop that has finished
+            # since, if at all, and can no longer be closed.
+            return
+        task = loop.create_task(remote_connection.aclose())
+        self._closing_connections.add(task)
+        task.add_done_callback(self._closing_connections.discard)
+
+    async def aclose(self):
+        """Closes the pooled connections to all remote agents."""
+        if self._discovery_task:
+            self._discovery_task.cancel()
+        for remote_connection in self.remote_agent_connections.values():
+            await remote_connection.aclose()
+        if self._closing_connections:
+            await asyncio.gather(*self._closing_connections, return_exceptions=True)
+
     def create_agent(self) -> Agent:
         return Agent(
             model='gemini-2.5-flash-preview-04-17',
@@ -92,6 +238,8 @@ class HostAgent:
             tools=[
                 self.list_remote_agents,
                 self.send_task,
+                self.send_tasks_parallel,
+                self.execute_plan,
             ],
             planner=BuiltInPlanner(
                 thinking_config=ThinkingConfig(include_thoughts=True, thinking_budget=8000)
@@ -116,6 +264,8 @@ appropriate remote agents and coordinate their work to fulfill complex objective
 
 **Execution Tool:**
 -   `send_task`: Use this tool to delegate a specific, actionable task to a named remote agent. You MUST specify the `agent_name` and a detailed `message` for the agent.
+-   `send_tasks_parallel`: Use this tool to delegate several independent tasks at once. Pass a list of `tasks`, each with an `agent_name` and a detailed `message`. The tasks run concurrently and their results are returned in the same order, each with either a `result` or an `error`.
+-   `execute_plan`: Use this tool to execute a whole confirmed plan in one call. Pass the plan as a list of `nodes`, each with a unique `id`, an `agent_name`, a detailed `message` and the `depends_on` ids of the tasks it needs. To use the output of an earlier task in a message, reference that task by its id as described in the `execute_plan` tool. Independent tasks run concurrently, and each task starts as soon as its dependencies are done.
 
 **Workflow for Complex Requests (requiring multiple agents or steps):**
 
@@ -137,12 +287,12 @@ appropriate remote agents and coordinate their work to fulfill complex objective
     b.  If the user suggests modifications, revise the plan and seek confirmation again.
 
 3.  **Execution (After User Confirmation):**
-    a.  Execute the confirmed plan step-by-step, respecting the defined hierarchy and dependencies.
+    a.  Execute the confirmed plan, respecting the defined hierarchy and dependencies. Prefer running the whole plan with a single `execute_plan` call; fall back to executing it step-by-step when a task's message can only be written after seeing earlier results.
     b.  When a task is ready to be executed, use the `send_task` tool.
     c.  **Context is Key for Sub-Agents:** When constructing the `message` for `send_task`:
         i.  Provide the sub-agent with all necessary context. This includes the relevant part of the original user request, and crucially, any outputs from prerequisite tasks (if this task depends on them).
         ii. Instruct the sub-agent to perform its specific task and to return its *complete output, all generated data, and a clear explanation of its actions and results*. This ensures you have the necessary information for subsequent dependent tasks or for the final response to the user.
-    d.  **Parallel Execution:** If your plan includes tasks that can be run in parallel, you can issue `send_task` calls for these tasks concurrently in your response when it's their turn to execute.
+    d.  **Parallel Execution:** If your plan includes tasks that can be run in parallel, send them together with a single `send_tasks_parallel` call when it's their turn to execute.
     e.  Inform the user about the progress, which tasks are being initiated, and upon completion of all tasks, provide a synthesized final answer.
 
 **General Guidelines:**
@@ -174,6 +324,7 @@ Current agent: {current_agent['active_agent']}
     def before_model_callback(
         self, callback_context: CallbackContext, llm_request
     ):
+        self._ensure_discovery_task()
         state = callback_context.state
         if 'session_active' not in state or not state['session_active']:
             if 'session_id' not in state:
@@ -207,20 +358,183 @@ Current agent: {current_agent['active_agent']}
         Yields:
           A dictionary of JSON data.
         """
-        if agent_name not in self.remote_agent_connections:
-            raise ValueError(f'Agent {agent_name} not found')
+        client = self._get_connection(agent_name)
         state = tool_context.state
         state['agent'] = agent_name
-        card = self.cards[agent_name]
-        client = self.remote_agent_connections[agent_name]
-        if not client:
-            raise ValueError(f'Client not available for {agent_name}')
         if 'task_id' in state:
             taskId = state['task_id']
         else:
             taskId = str(uuid.uuid4())
-        sessionId = state['session_id']
-        task: Task
+        request = self._new_task_request(state, taskId, message)
+        task_result = await client.send_task(request, self.task_callback)
+
+        if task_result is None:
+            # If task_result is None, handle the error case
+            state['session_active'] = False
+            return [{"error": f"Task dispatch to agent '{agent_name}' failed to return a task status."}]
+
+        # Only proceed if task_result is not None
+        # Assume completion unless a state returns that isn't complete
+        state['session_active'] = task_result.status.state not in [
+            TaskState.COMPLETED,
+            TaskState.CANCELED,
+            TaskState.FAILED,
+            TaskState.UNKNOWN,
+        ]
+        return self._convert_task_result(agent_name, task_result, tool_context)
+
+    async def send_tasks_parallel(
+        self, tasks: list[dict], tool_context: ToolContext
+    ):
+        """Sends several independent tasks to remote agents concurrently.
+
+        Use this instead of several send_task calls when the tasks do not
+        depend on each other's output. Each task is a new task for its agent.
+
+        Args:
+          tasks: The tasks to send, each a dictionary with the `agent_name`
+            of the agent to send it to and the `message` for the agent.
+          tool_context: The tool context this method runs in.
+
+        Returns:
+          One dictionary per task, in the order given, with the `agent_name`
+          and either the `result` of the task or an `error`.
+        """
+        for task in tasks:
+            self._get_connection(task.get('agent_name'))
+        semaphore = asyncio.Semaphore(self.max_parallel_tasks)
+
+        async def run(task: dict):
+            async with semaphore:
+                return await self._run_new_task(
+                    task['agent_name'], task.get('message', ''), tool_context
+                )
+
+        runs = [asyncio.create_task(run(task)) for task in tasks]
+        _, pending = await asyncio.wait(
+            runs, timeout=self.parallel_tasks_timeout
+        )
+        for run_task in pending:
+            run_task.cancel()
+        if pending:
+            await asyncio.wait(pending)
+
+        results = []
+        for task, run_task in zip(tasks, runs):
+            agent_name = task['agent_name']
+            if run_task in pending:
+                results.append(
+                    {
+                        'agent_name': agent_name,
+                        'error': f'Timed out after {self.parallel_tasks_timeout}s',
+                    }
+                )
+            elif run_task.exception() is not None:
+                logger.warning(
+                    'Task for %s failed: %s', agent_name, run_task.exception()
+                )
+                results.append(
+                    {'agent_name': agent_name, 'error': str(run_task.exception())}
+                )
+            else:
+                results.append(
+                    {'agent_name': agent_name, 'result': run_task.result()}
+                )
+        return results
+
+    async def execute_plan(self, nodes: list[dict], tool_context: ToolContext):
+        """Executes a confirmed plan of dependent tasks in a single call.
+
+        Every task starts as soon as the tasks it depends on completed, and
+        tasks that do not depend on each other run concurrently. Write
+        `{{id}}` in a message to insert the output of the task with that id;
+        such a reference also makes it a dependency.
+
+        Args:
+          nodes: The tasks of the plan, each a dictionary with a unique `id`,
+            the `agent_name` to send it to, the `message` for the agent and
+            optionally `depends_on`, a list of ids of tasks to wait for.
+          tool_context: The tool context this method runs in.
+
+        Returns:
+          The status and output or error of every task, in the order given,
+          with their start times and durations in seconds.
+        """
+        plan = [PlanNode(**node) for node in nodes]
+        for node in plan:
+            self._get_connection(node.agent_name)
+
+        async def send(agent_name: str, message: str):
+            return await self._run_new_task(agent_name, message, tool_context)
+
+        executor = PlanExecutor(
+            send,
+            max_concurrency=self.max_parallel_tasks,
+            timeout=self.parallel_tasks_timeout,
+        )
+        result = await executor.execute(plan)
+        logger.info(
+            'Executed plan of %d tasks in %.2fs (%.2fs sequentially)',
+            len(plan),
+            result.wall_time,
+            result.sequential_time,
+        )
+        return result.model_dump(exclude_none=True)
+
+    async def _run_new_task(
+        self, agent_name: str, message: str, tool_context: ToolContext
+    ) -> list:
+        """Runs a new task on a remote agent and returns its converted output.
+
+        The task gets a session of its own on the remote agent, since tasks
+        sent concurrently to one agent would otherwise interleave their
+        events in one session. If the caller is cancelled, the remote task
+        is cancelled as well.
+        """
+        client = self._get_connection(agent_name)
+        taskId = str(uuid.uuid4())
+        request = self._new_task_request(
+            tool_context.state, taskId, message, sessionId=str(uuid.uuid4())
+        )
+        try:
+            task_result = await client.send_task(request, self.task_callback)
+        except asyncio.CancelledError:
+            await self._cancel_remote_task(agent_name, taskId)
+            raise
+        if task_result is None:
+            raise ValueError(
+                f"Task dispatch to agent '{agent_name}' failed to return a"
+                ' task status.'
+            )
+        return self._convert_task_result(agent_name, task_result, tool_context)
+
+    def _get_connection(self, agent_name: str) -> RemoteAgentConnections:
+        if agent_name not in self.remote_agent_connections:
+            raise ValueError(f'Agent {agent_name} not found')
+        client = self.remote_agent_connections[agent_name]
+        if not client:
+            raise ValueError(f'Client not available for {agent_name}')
+        return client
+
+    async def _cancel_remote_task(self, agent_name: str, task_id: str):
+        """Asks a remote agent to stop a task it no longer needs to finish."""
+        client = self.remote_agent_connections[agent_name].agent_client
+        try:
+            await asyncio.wait_for(
+                client.cancel_task({'id': task_id}), self.discovery_timeout
+            )
+        except Exception as e:
+            logger.warning(
+                'Failed to cancel task %s of %s: %r', task_id, agent_name, e
+            )
+
+    def _new_task_request(
+        self, state, taskId: str, message: str, sessionId: str | None = None
+    ) -> TaskSendParams:
+        """Builds a task in the conversation's session, or in `sessionId`."""
+        conversationId = state['session_id']
+        if sessionId is None:
+            sessionId = conversationId
         messageId = ''
         metadata = {}
         if 'input_message_metadata' in state:
@@ -229,8 +543,8 @@ Current agent: {current_agent['active_agent']}
                 messageId = state['input_message_metadata']['message_id']
         if not messageId:
             messageId = str(uuid.uuid4())
-        metadata.update(conversation_id=sessionId, message_id=messageId)
-        request: TaskSendParams = TaskSendParams(
+        metadata.update(conversation_id=conversationId, message_id=messageId)
+        return TaskSendParams(
             id=taskId,
             sessionId=sessionId,
             message=Message(
@@ -240,23 +554,12 @@ Current agent: {current_agent['active_agent']}
             ),
             acceptedOutputModes=['text', 'text/plain', 'image/png'],
             # pushNotification=None,
-            metadata={'conversation_id': sessionId},
+            metadata={'conversation_id': conversationId},
         )
-        task_result = await client.send_task(request, self.task_callback)
 
-        if task_result is None:
-            # If task_result is None, handle the error case
-            state['session_active'] = False
-            return [{"error": f"Task dispatch to agent '{agent_name}' failed to return a task status."}]
-
-        # Only proceed if task_result is not None
-        # Assume completion unless a state returns that isn't complete
-        state['session_active'] = task_result.status.state not in [
-            TaskState.COMPLETED,
-            TaskState.CANCELED,
-            TaskState.FAILED,
-            TaskState.UNKNOWN,
-        ]
+    def _convert_task_result(
+        self, agent_name: str, task_result: Task, tool_context: ToolContext
+    ) -> list:
         if task_result.status.state == TaskState.INPUT_REQUIRED:
             # Force user input back
             tool_context.actions.skip_summarization = True
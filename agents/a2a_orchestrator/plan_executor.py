@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import re
+import time
+
+from collections.abc import Awaitable, Callable
+from typing import Any, Literal
+
+from pydantic import BaseModel, Field
+
+
+logger = logging.getLogger(__name__)
+
+# Matches `{{node_id}}` references to the output of another node.
+NODE_REFERENCE = re.compile(r'\{\{\s*([\w.-]+)\s*\}\}')
+
+SendTaskFn = Callable[[str, str], Awaitable[Any]]
+
+
+class PlanNode(BaseModel):
+    """One task of a plan, sent to `agent_name` once its dependencies ran.
+
+    Every `{{node_id}}` in the message is replaced with the output of that
+    node, which makes it an implicit dependency.
+    """
+
+    id: str
+    agent_name: str
+    message: str
+    depends_on: list[str] = Field(default_factory=list)
+
+    def dependencies(self) -> set[str]:
+        return set(self.depends_on) | set(NODE_REFERENCE.findall(self.message))
+
+
+class NodeResult(BaseModel):
+    node_id: str
+    agent_name: str
+    status: Literal['completed', 'failed', 'skipped']
+    output: Any | None = None
+    error: str | None = None
+    # Seconds since the start of the plan, and how long the node ran.
+    started_at: float | None = None
+    duration: float | None = None
+
+
+class PlanResult(BaseModel):
+    nodes: list[NodeResult]
+    # The wall-clock time of the plan, against the sum of all node durations
+    # that running the nodes one after another would have taken.
+    wall_time: float
+    sequential_time: float
+
+
+def render_output(output: Any) -> str:
+    """Renders the output of a node as text to substitute into a message."""
+    if isinstance(output, str):
+        return output
+    if isinstance(output, list):
+        return '\n'.join(render_output(item) for item in output)
+    if isinstance(output, BaseModel):
+        return output.model_dump_json(exclude_none=True)
+    return json.dumps(output, default=str)
+
+
+class PlanExecutor:
+    """Runs a DAG of tasks with as much concurrency as the dependencies allow.
+
+    A node starts as soon as all of its dependencies completed, with at most
+    `max_concurrency` nodes running at once. When a node fails, the nodes
+    depending on it are skipped, while independent branches carry on. Nodes
+    still running after `timeout` seconds are cancelled and reported failed.
+    """
+
+    def __init__(
+        self,
+        send_task: SendTaskFn,
+        max_concurrency: int = 4,
+        timeout: float | None = None,
+    ):
+        self.send_task = send_task
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+
+    @staticmethod
+    def validate(nodes: list[PlanNode]) -> dict[str, set[str]]:
+        """Checks the plan is a DAG and returns the dependencies of each node.
+
+        Raises:
+          ValueError: If node ids are not unique, a dependency does not exist
+            or the dependencies form a cycle.
+        """
+        dependencies: dict[str, set[str]] = {}
+        for node in nodes:
+            if node.id in dependencies:
+                raise ValueError(f'Duplicate plan node id: {node.id}')
+            dependencies[node.id] = node.dependencies()
+        for node_id, node_dependencies in dependencies.items():
+            unknown = node_dependencies - dependencies.keys()
+            if unknown:
+                raise ValueError(
+                    f'Plan node {node_id} depends on unknown nodes: '
+                    f'{sorted(unknown)}'
+                )
+
+        remaining = {
+            node_id: set(node_dependencies)
+            for node_id, node_dependencies in dependencies.items()
+        }
+        while remaining:
+            ready = [node_id for node_id, deps in remaining.items() if not deps]
+            if not ready:
+                raise ValueError(
+                    f'Plan has a dependency cycle between: {sorted(remaining)}'
+                )
+            for node_id in ready:
+                del remaining[node_id]
+            for deps in remaining.values():
+                deps.difference_update(ready)
+        return dependencies
+
+    async def execute(self, nodes: list[PlanNode]) -> PlanResult:
+        dependencies = self.validate(nodes)
+        nodes_by_id = {node.id: node for node in nodes}
+        dependents: dict[str, list[str]] = {node.id: [] for node in nodes}
+        for node_id, node_dependencies in dependencies.items():
+            for dependency in node_dependencies:
+                dependents[dependency].append(node_id)
+        waiting_on = {
+            node_id: len(node_dependencies)
+            for node_id, node_dependencies in dependencies.items()
+        }
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        results: dict[str, NodeResult] = {}
+        running: dict[asyncio.Task, str] = {}
+        plan_start = time.monotonic()
+
+        async def run(node: PlanNode) -> NodeResult:
+            async with semaphore:
+                started = time.monotonic()
+                message = NODE_REFERENCE.sub(
+                    lambda m: render_output(results[m.group(1)].output),
+                    node.message,
+                )
+                try:
+                    output = await self.send_task(node.agent_name, message)
+                except Exception as e:
+                    logger.warning(f'Plan node {node.id} failed: {e}')
+                    status, output, error = 'failed', None, str(e)
+                else:
+                    status, error = 'completed', None
+                return NodeResult(
+                    node_id=node.id,
+                    agent_name=node.agent_name,
+                    status=status,
+                    output=output,
+                    error=error,
+                    started_at=started - plan_start,
+                    duration=time.monotonic() - started,
+                )
+
+        def start(node_id: str):
+            running[asyncio.create_task(run(nodes_by_id[node_id]))] = node_id
+
+        def skip(node_id: str, reason: str):
+            if node_id in results:
+                return
+            node = nodes_by_id[node_id]
+            results[node_id] = NodeResult(
+                node_id=node_id,
+                agent_name=node.agent_name,
+                status='skipped',
+                error=reason,
+            )
+            for dependent in dependents[node_id]:
+                skip(dependent, f'Dependency {node_id} did not complete')
+
+        for node_id, count in waiting_on.items():
+            if count == 0:
+                start(node_id)
+
+        deadline = None if self.timeout is None else plan_start + self.timeout
+        while running:
+            timeout = None
+            if deadline is not None:
+                timeout = max(deadline - time.monotonic(), 0)
+            done, _ = await asyncio.wait(
+                running, timeout=timeout, return_when=asyncio.FIRST_COMPLETED
+            )
+            if not done:
+                break
+            for finished in done:
+                node_id = running.pop(finished)
+                result = finished.result()
+                results[node_id] = result
+                for dependent in dependents[node_id]:
+                    if result.status != 'completed':
+                        skip(dependent, f'Dependency {node_id} {result.status}')
+                        continue
+                    waiting_on[dependent] -= 1
+                    if waiting_on[dependent] == 0 and dependent not in results:
+                        start(dependent)
+
+        if running:
+            for task in running:
+                task.cancel()
+            await asyncio.wait(running)
+            for node_id in running.values():
+                node = nodes_by_id[node_id]
+                results[node_id] = NodeResult(
+                    node_id=node_id,
+                    agent_name=node.agent_name,
+                    status='failed',
+                    error=f'Timed out after {self.timeout}s',
+                )
+                for dependent in dependents[node_id]:
+                    skip(dependent, f'Dependency {node_id} timed out')
+        for node in nodes:
+            # Nodes left waiting on timed out ones were never started.
+            if node.id not in results:
+                skip(node.id, 'Plan timed out')
+
+        ordered = [results[node.id] for node in nodes]
+        return PlanResult(
+            nodes=ordered,
+            wall_time=time.monotonic() - plan_start,
+            sequential_time=sum(result.duration or 0 for result in ordered),
+        )
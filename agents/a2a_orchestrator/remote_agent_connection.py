@@ -1,22 +1,30 @@
+import logging
 import uuid
 
 from collections.abc import Callable
 
 from common.client import A2AClient
 from common.types import (
+    A2AClientHTTPError,
     AgentCard,
+    Message,
     Task,
     TaskArtifactUpdateEvent,
     TaskSendParams,
     TaskState,
     TaskStatus,
     TaskStatusUpdateEvent,
+    TextPart,
 )
 
 
 TaskCallbackArg = Task | TaskStatusUpdateEvent | TaskArtifactUpdateEvent
 TaskUpdateCallback = Callable[[TaskCallbackArg, AgentCard], Task]
 
+MAX_STREAM_RECONNECTS = 3
+
+logger = logging.getLogger(__name__)
+
 
 class RemoteAgentConnections:
     """A class to hold the connections to the remote agents."""
@@ -32,6 +40,10 @@ class RemoteAgentConnections:
     def get_agent(self) -> AgentCard:
         return self.card
 
+    async def aclose(self):
+        """Closes the pooled HTTP connections to the remote agent."""
+        await self.agent_client.aclose()
+
     async def send_task(
         self,
         request: TaskSendParams,
@@ -55,43 +67,86 @@ class RemoteAgentConnections:
                 # Notify callback about the initial submitted state
                 task_callback(current_task_state, self.card)
 
-            async for response_wrapper in self.agent_client.send_task_streaming(
+            stream = self.agent_client.send_task_streaming(
                 request.model_dump() # Send original request params
-            ):
-                event_data = response_wrapper.result # This is TaskStatusUpdateEvent or TaskArtifactUpdateEvent
+            )
+            last_sequence = None
+            reconnects = 0
+            finished = False
+            while True:
+                stream_error = None
+                try:
+                    async for response_wrapper in stream:
+                        if response_wrapper.error:
+                            # An error ends the stream; the task failed remotely.
+                            current_task_state.status = TaskStatus(
+                                state=TaskState.FAILED,
+                                message=Message(
+                                    role='agent',
+                                    parts=[TextPart(text=response_wrapper.error.message)],
+                                ),
+                            )
+                            finished = True
+                            break
+                        event_data = response_wrapper.result # This is TaskStatusUpdateEvent or TaskArtifactUpdateEvent
                 
-                # It's important that event_data itself (TaskStatusUpdateEvent/TaskArtifactUpdateEvent)
-                # does not have its metadata merged from the top-level request,
-                # but its sub-objects like status.message might.
-
-                if isinstance(event_data, TaskStatusUpdateEvent):
-                    current_task_state.status = event_data.status
-                    if current_task_state.status.message:
-                        # Merge metadata for the message part of the status
-                        merge_metadata(current_task_state.status.message, request.message)
-                        m = current_task_state.status.message
-                        if not m.metadata:
-                            m.metadata = {}
-                        # Preserve original message_id if present, then add new one
-                        if 'message_id' in m.metadata and m.metadata['message_id'] != request.message.metadata.get('message_id'):
-                             m.metadata['last_message_id'] = m.metadata['message_id']
-                        m.metadata['message_id'] = str(uuid.uuid4())
-
-
-                elif isinstance(event_data, TaskArtifactUpdateEvent):
-                    if current_task_state.artifacts is None: # Should be initialized as []
-                        current_task_state.artifacts = []
-                    # TODO: Handle artifact append/index logic if needed by A2A spec for complex artifacts
-                    current_task_state.artifacts.append(event_data.artifact)
-                    # Artifacts themselves might have metadata, but usually not merged from request.message
-
-                if task_callback:
-                    # Callback receives the raw event (TaskStatusUpdateEvent or TaskArtifactUpdateEvent)
-                    task_callback(event_data, self.card) 
-
-                if hasattr(event_data, 'final') and event_data.final:
+                        # It's important that event_data itself (TaskStatusUpdateEvent/TaskArtifactUpdateEvent)
+                        # does not have its metadata merged from the top-level request,
+                        # but its sub-objects like status.message might.
+
+                        if isinstance(event_data, TaskStatusUpdateEvent):
+                            current_task_state.status = event_data.status
+                            if current_task_state.status.message:
+                                # Merge metadata for the message part of the status
+                                merge_metadata(current_task_state.status.message, request.message)
+                                m = current_task_state.status.message
+                                if not m.metadata:
+                                    m.metadata = {}
+                                # Preserve original message_id if present, then add new one
+                                if 'message_id' in m.metadata and m.metadata['message_id'] != request.message.metadata.get('message_id'):
+                                     m.metadata['last_message_id'] = m.metadata['message_id']
+                                m.metadata['message_id'] = str(uuid.uuid4())
+
+
+                        elif isinstance(event_data, TaskArtifactUpdateEvent):
+                            if current_task_state.artifacts is None: # Should be initialized as []
+                                current_task_state.artifacts = []
+                            # TODO: Handle artifact append/index logic if needed by A2A spec for complex artifacts
+                            current_task_state.artifacts.append(event_data.artifact)
+                            # Artifacts themselves might have metadata, but usually not merged from request.message
+
+                        if task_callback:
+                            # Callback receives the raw event (TaskStatusUpdateEvent or TaskArtifactUpdateEvent)
+                            task_callback(event_data, self.card) 
+
+                        # Remember the stream position in case we need to resubscribe
+                        sequence = (getattr(event_data, 'metadata', None) or {}).get('sequence')
+                        if sequence is not None:
+                            last_sequence = sequence
+
+                        if hasattr(event_data, 'final') and event_data.final:
+                            finished = True
+                            break
+                except A2AClientHTTPError as e:
+                    stream_error = e
+
+                if finished:
+                    break
+                # The stream dropped (or the server disconnected us for falling behind)
+                # before the final event: resume from the last event received instead
+                # of re-running the remote task.
+                if reconnects >= MAX_STREAM_RECONNECTS:
+                    if stream_error is not None:
+                        raise stream_error
                     break
-            
+                reconnects += 1
+                logger.warning(
+                    f'Stream from {self.card.name} for task {request.id} ended early ({stream_error}), resubscribing'
+                )
+                stream = self.agent_client.resubscribe_task(
+                    {'id': request.id, 'lastSequence': last_sequence}
+                )
+
             # After stream, current_task_state should reflect the final state
             return current_task_state
         
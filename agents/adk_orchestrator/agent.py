@@ -1,7 +1,7 @@
 from google.adk.agents import LlmAgent, LoopAgent, SequentialAgent
 from google.adk.tools import google_search, agent_tool
 from google.genai.types import GenerateContentConfig, ThinkingConfig
-from .tools import get_notion_tools, scrape_linkedin_profile, get_calendar_tools, get_event_attendees
+from .tools import get_notion_tools, scrape_linkedin_profile, scrape_linkedin_profiles, get_calendar_tools, get_event_attendees, get_events_attendees
 from datetime import datetime, timezone
 from google.adk.planners import BuiltInPlanner
 from google.adk.code_executors import VertexAiCodeExecutor
@@ -103,16 +103,18 @@ You can structure the report in any way you want, but it should always contain a
     scrape_profile_agent = LlmAgent(
         model="gemini-2.5-flash-preview-04-17",
         name="scrape_profile_agent",
-        description="An agent that specializes in gathering information about people from LinkedIn based on a first name, last name (optional) and company domain.",
+        description="An agent that specializes in gathering information about people from LinkedIn based on a first name, last name (optional) and company domain, or on their email addresses.",
         instruction="""Scrape a LinkedIn profile and provide a brief of the person that should be used for preparing for a meeting with the person.
         If the full name is not available, use what is provided by the user or an empty string on the last_name field.
         Never use the name of the company as the last name of the person, if the last name is not provided by the user use an empty string.
+        When asked about more than one person, e.g. all the attendees of a meeting, use `scrape_linkedin_profiles` once with all of them instead of calling `scrape_linkedin_profile` for each person. Attendees can be passed by their email address.
         """,
-        tools=[scrape_linkedin_profile],
+        tools=[scrape_linkedin_profile, scrape_linkedin_profiles],
     )
 
     calendar_tools = get_calendar_tools()
     calendar_tools.append(get_event_attendees)
+    calendar_tools.append(get_events_attendees)
     calendar_agent = LlmAgent(
         model="gemini-2.5-flash-preview-04-17",
         name="calendar_agent",
@@ -123,6 +125,7 @@ Tools available:
 - `GetCalendarsInfo`: Lists calendars the authenticated user has access to and their IDs. Returns a list of dictionaries, e.g., `[{'id': 'user@example.com', 'summary': 'My Calendar'}, ...]`.
 - `CalendarSearchEvents`: Searches for events within specific calendars and a time range. Requires `min_datetime` (YYYY-MM-DD HH:MM:SS), `max_datetime` (YYYY-MM-DD HH:MM:SS), and `calendars_info` arguments. Do NOT include a separate `calendar_id` parameter for `CalendarSearchEvents`; all calendar identification is handled via the `calendars_info` parameter.
 - `get_event_attendees`: Gets the list of attendees for a specific event ID in a specific calendar.
+- `get_events_attendees`: Gets the attendees of several events of a calendar at once. Use it instead of calling `get_event_attendees` for each event.
 - `GetCurrentDatetime`: Gets the current date and time. You can optionally request a specific format.
 
 Guidelines:
@@ -190,8 +193,8 @@ Your primary goal is to successfully complete the user's request by leveraging t
 
 **Agent & Tool Capabilities:**
 *   `notion_agent`: Manages content within the "Agent Collection" Notion page/subpages. Can create pages (`API-post-page`) and append content blocks to existing pages/blocks (`API-patch-block-children`). Requires page/parent IDs. **Executes sequences (like create page -> create subpage -> populate) without stopping.**
-*   `scrape_profile_agent`: Gathers LinkedIn info about specific people (requires first name and company domain; last name is optional - use empty string if unknown). **Use ONLY for person profiles.**
-*   `calendar_agent`: Interacts with Google Calendar. Can list calendars (`GetCalendarsInfo`), determine the current date and calculate future dates (like 'tomorrow') using `GetCurrentDatetime`, search events (`CalendarSearchEvents` - requires JSON string for calendars, no `calendar_id`), and get attendees (`get_event_attendees`). For complex scheduling (e.g., finding mutual availability), it gathers data from multiple calendars and then **delegates the analysis of this data to the `coding_agent`**. Respect its usage guidelines (default user, search restrictions, parameter formats).
+*   `scrape_profile_agent`: Gathers LinkedIn info about specific people (requires first name and company domain; last name is optional - use empty string if unknown). It can also look up a whole list of people, such as all attendees of a meeting, in one go from their email addresses - pass it the full list at once. **Use ONLY for person profiles.**
+*   `calendar_agent`: Interacts with Google Calendar. Can list calendars (`GetCalendarsInfo`), determine the current date and calculate future dates (like 'tomorrow') using `GetCurrentDatetime`, search events (`CalendarSearchEvents` - requires JSON string for calendars, no `calendar_id`), and get attendees (`get_event_attendees`, or `get_events_attendees` for several events at once). For complex scheduling (e.g., finding mutual availability), it gathers data from multiple calendars and then **delegates the analysis of this data to the `coding_agent`**. Respect its usage guidelines (default user, search restrictions, parameter formats).
 *   `deep_research_tool (Your tool)`: Performs multi-step research and generates a report (output key: `report`) on a company or topic. **Use ONLY for company/topic research. never use this tool for person profiles.**
 *   `search_tool` (Your tool)`: Performs simple web searches. **Use ONLY for quick lookups, not deep research or person profiles.**
 *   `coding_agent`: Writes and executes Python code for calculations, data analysis, and general programming tasks. It is the designated agent for any complex logical operations or computations, including analyzing data provided by other agents (e.g., calendar event data).
@@ -2,22 +2,53 @@ from google.adk.tools.mcp_tool.mcp_toolset import (
     MCPToolset,
     StdioServerParameters,
 )
-import requests
+import asyncio
+import httpx
 from langchain_google_community.calendar.search_events import CalendarSearchEvents
 from langchain_google_community.calendar.current_datetime import GetCurrentDatetime
 from langchain_google_community.calendar.get_calendars_info import GetCalendarsInfo
-from langchain_google_community.calendar.utils import (
-    build_resource_service,
-)
-import google.auth
 from google.adk.tools.langchain_tool import LangchainTool
 from dotenv import load_dotenv
 import os
+import time
+from common.utils.disk_cache import DiskCache
+from common.utils.calendar_service import get_calendar_service_provider, get_event_attendees, get_events_attendees
+from common.utils.memoize import memoize
 
 load_dotenv()
 
 NOTION_API_KEY = os.getenv("NOTION_API_KEY")
 PROXYCURL_API_KEY = os.getenv("PROXYCURL_API_KEY")
+# Can point at a local stub serving canned profiles during development.
+PROXYCURL_API_ENDPOINT = os.getenv("PROXYCURL_API_ENDPOINT", "https://nubela.co/proxycurl/api/linkedin/profile/resolve")
+# Resolved profile briefs are kept on disk across restarts for a week.
+LINKEDIN_PROFILE_CACHE_DIR = os.getenv("LINKEDIN_PROFILE_CACHE_DIR", os.path.join("~", ".cache", "a2a", "linkedin_profiles"))
+LINKEDIN_PROFILE_CACHE_TTL = 7 * 24 * 60 * 60
+# Limits on the profiles resolved at once by scrape_linkedin_profiles, and on
+# the requests sent to the API, which is rate limited per account.
+LINKEDIN_MAX_CONCURRENT_LOOKUPS = 4
+PROXYCURL_MAX_REQUESTS_PER_SECOND = 5
+
+_profile_cache = DiskCache(LINKEDIN_PROFILE_CACHE_DIR)
+_http_client: httpx.AsyncClient | None = None
+
+_next_request_at = 0.0
+
+async def _wait_for_rate_limit():
+    # Spaces out the API requests; cached lookups do not wait.
+    global _next_request_at
+    now = time.monotonic()
+    start = max(now, _next_request_at)
+    _next_request_at = start + 1 / PROXYCURL_MAX_REQUESTS_PER_SECOND
+    if start > now:
+        await asyncio.sleep(start - now)
+
+def _get_http_client() -> httpx.AsyncClient:
+    # Shared by all lookups so that connections to the API are reused.
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=30.0)
+    return _http_client
 
 async def get_notion_tools():
     """Gets tools from the File System MCP Server."""
@@ -112,7 +143,14 @@ def linkedin_brief(raw_json):
 
     return brief
 
-def scrape_linkedin_profile(company_domain: str, first_name: str, last_name: str) -> dict:
+def _normalize_person(arguments: dict) -> dict:
+    # Domains and names are case-insensitive for the lookup.
+    return {key: (value or "").strip().lower() for key, value in arguments.items()}
+
+# Profiles change rarely; a person who could not be resolved is only retried
+# after a few minutes. Failed requests, e.g. rate limited ones, are not cached.
+@memoize(ttl=24 * 60 * 60, negative_ttl=10 * 60, is_negative=lambda brief: not brief, cache_errors=(), normalize=_normalize_person)
+async def scrape_linkedin_profile(company_domain: str, first_name: str, last_name: str) -> dict:
     """
     Fetches and summarizes a LinkedIn profile using the Proxycurl API, or returns a mock response for development/testing.
 
@@ -124,19 +162,34 @@ def scrape_linkedin_profile(company_domain: str, first_name: str, last_name: str
     Returns:
         dict: A filtered and formatted brief of the LinkedIn profile, containing only relevant, non-empty fields.
     """
+    person = _normalize_person({'company_domain': company_domain, 'first_name': first_name, 'last_name': last_name})
+    cache_key = '|'.join([person['company_domain'], person['first_name'], person['last_name']])
+    cached = _profile_cache.get(cache_key)
+    if cached and time.time() - cached['fetched_at'] < LINKEDIN_PROFILE_CACHE_TTL:
+        return cached['brief']
+
     # similarity_checks and enrich_profile are hardcoded as per API requirements
-    api_endpoint = 'https://nubela.co/proxycurl/api/linkedin/profile/resolve'
-    headers = {'Authorization': 'Bearer ' + PROXYCURL_API_KEY}
+    headers = {'Authorization': f'Bearer {PROXYCURL_API_KEY}'}
     params = {
         'company_domain': company_domain,
         'first_name': first_name,
-        'last_name': last_name,
+        'last_name': last_name or '',
         'similarity_checks': 'include',
         'enrich_profile': 'enrich',
     }
-    response = requests.get(api_endpoint, params=params, headers=headers)
+    await _wait_for_rate_limit()
+    response = await _get_http_client().get(PROXYCURL_API_ENDPOINT, params=params, headers=headers)
+    if response.status_code == 404:
+        # The API could not resolve the person.
+        return {}
+    # Rate limiting and server errors are raised rather than taken for a miss.
+    response.raise_for_status()
     raw_response = response.json()
-    return linkedin_brief(raw_response)
+    brief = linkedin_brief(raw_response)
+    # Only found profiles are persisted; misses are retried on a later run.
+    if brief:
+        _profile_cache.set(cache_key, {'fetched_at': time.time(), 'brief': brief})
+    return brief
 
     # # Using mock response:
     # mock_response = {
@@ -196,29 +249,62 @@ def scrape_linkedin_profile(company_domain: str, first_name: str, last_name: str
     # }
     # return linkedin_brief(mock_response)
 
-def get_calendar_tools():
-    credentials, _ = google.auth.default()
-    api_resource = build_resource_service(credentials=credentials)
-    calendar_tools = [
-        LangchainTool(tool=CalendarSearchEvents(api_resource=api_resource)),
-        LangchainTool(tool=GetCurrentDatetime(api_resource=api_resource)),
-        LangchainTool(tool=GetCalendarsInfo(api_resource=api_resource)),
-    ]
-    return calendar_tools
+def _attendee_person(attendee: str | dict) -> dict:
+    # Fills in what is missing from the attendee's email, e.g. jon.doe@comm-it.com,
+    # which is all there is when the attendee is given as a string.
+    if isinstance(attendee, str):
+        attendee = {"email": attendee}
+    local_part, _, domain = attendee.get("email", "").partition("@")
+    names = local_part.replace("_", ".").split(".") if local_part else []
+    return {
+        "company_domain": attendee.get("company_domain") or domain,
+        "first_name": attendee.get("first_name") or (names[0] if names else ""),
+        "last_name": attendee.get("last_name") if attendee.get("last_name") is not None else (names[-1] if len(names) > 1 else ""),
+    }
 
-def get_event_attendees(calendar_id: str, event_id: str) -> list:
+async def scrape_linkedin_profiles(attendees: list[str | dict]) -> list[dict]:
     """
-    Fetches the attendees of a specific Google Calendar event.
+    Fetches and summarizes the LinkedIn profiles of several people at once, e.g. all the attendees of a meeting.
 
     Args:
-        calendar_id (str): The ID of the calendar containing the event. (email address)
-        event_id (str): The ID of the event.
+        attendees (list[str | dict]): The people to look up. Each one is an email (e.g. 'jon.doe@comm-it.com'), as returned by get_events_attendees, or a dict with either an 'email', or a 'company_domain', 'first_name' and 'last_name' (can be an empty string), which take precedence over what is derived from the email.
 
     Returns:
-        list: A list of attendee email addresses, or an empty list if none.
+        list[dict]: One row per attendee, in order, with the 'attendee', a 'status' of 'found', 'not_found' or 'error', and the 'profile' brief or the 'error'.
     """
-    credentials, _ = google.auth.default()
-    api_resource = build_resource_service(credentials=credentials)
-    event = api_resource.events().get(calendarId=calendar_id, eventId=event_id).execute()
-    attendees = event.get('attendees', [])
-    return [attendee.get('email') for attendee in attendees if 'email' in attendee]
\ No newline at end of file
+    semaphore = asyncio.Semaphore(LINKEDIN_MAX_CONCURRENT_LOOKUPS)
+    lookups = {}
+
+    async def lookup(person):
+        async with semaphore:
+            return await scrape_linkedin_profile(**person)
+
+    rows = []
+    for attendee in attendees:
+        person = _attendee_person(attendee)
+        email = attendee if isinstance(attendee, str) else attendee.get("email")
+        # The same person listed twice, even spelled differently, is looked up once.
+        key = tuple(_normalize_person(person).values())
+        if key not in lookups:
+            lookups[key] = asyncio.ensure_future(lookup(person))
+        rows.append((email or " ".join(filter(None, [person["first_name"], person["last_name"]])), lookups[key]))
+    await asyncio.gather(*lookups.values(), return_exceptions=True)
+
+    table = []
+    for name, lookup_task in rows:
+        if lookup_task.exception() is not None:
+            table.append({"attendee": name, "status": "error", "error": str(lookup_task.exception())})
+        elif lookup_task.result():
+            table.append({"attendee": name, "status": "found", "profile": lookup_task.result()})
+        else:
+            table.append({"attendee": name, "status": "not_found"})
+    return table
+
+def get_calendar_tools():
+    api_resource = get_calendar_service_provider().get_service()
+    calendar_tools = [
+        LangchainTool(tool=CalendarSearchEvents(api_resource=api_resource)),
+        LangchainTool(tool=GetCurrentDatetime(api_resource=api_resource)),
+        LangchainTool(tool=GetCalendarsInfo(api_resource=api_resource)),
+    ]
+    return calendar_tools
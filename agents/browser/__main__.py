@@ -84,6 +84,9 @@ def main(host: str, port: int):  # This is now a synchronous function
             task_manager=task_manager,
             host=host,
             port=port,
+            # A single Playwright MCP process drives the browser.
+            max_in_flight_tasks=1,
+            max_queued_tasks=4,
         )
         logger.info(f"Starting Browser A2A Server at http://{host}:{port}")
         logger.info(f"Agent Card will be available at http://{host}:{port}/.well-known/agent.json")
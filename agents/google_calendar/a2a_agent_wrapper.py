@@ -21,7 +21,7 @@ class GoogleCalendarA2AWrapper:
     def get_processing_message(self) -> str:
         return "The Google Calendar agent is thinking..."
 
-    def invoke(self, query: str, session_id: str) -> str:
+    async def invoke(self, query: str, session_id: str) -> str:
         # Ensure session_id from A2A is used for ADK session
         # The ADK runner's app_name is already set to "google_calendar"
         
@@ -44,20 +44,23 @@ class GoogleCalendarA2AWrapper:
                 session_id=session_id,
             )
 
-        events = list(
-            self._runner.run(
-                user_id=self._user_id, # Use the mapped/default user_id
-                session_id=session.id, # Use the A2A provided session_id
-                new_message=user_content,
-            )
-        )
-        
-        if not events or not events[-1].content or not events[-1].content.parts:
+        # Use run_async rather than the synchronous Runner.run, which would block
+        # the event loop (and every other request to this server) for the whole
+        # LLM call. Only the last event is needed for the response.
+        last_event = None
+        async for event in self._runner.run_async(
+            user_id=self._user_id, # Use the mapped/default user_id
+            session_id=session.id, # Use the A2A provided session_id
+            new_message=user_content,
+        ):
+            last_event = event
+
+        if last_event is None or not last_event.content or not last_event.content.parts:
             return '' # Or some error/empty message
-        
+
         # Combine text parts from the last event
         response_text = '\n'.join(
-            [p.text for p in events[-1].content.parts if p.text is not None]
+            [p.text for p in last_event.content.parts if p.text is not None]
         )
         return response_text
 
@@ -1,5 +1,5 @@
 from google.adk.agents import LlmAgent
-from .tools import get_calendar_tools, get_event_attendees
+from .tools import get_calendar_tools, get_event_attendees, get_events_attendees
 from google.adk.planners import BuiltInPlanner
 from google.genai.types import GenerateContentConfig, ThinkingConfig
 from google.adk.runners import Runner
@@ -42,6 +42,7 @@ def simple_after_model_modifier(
 
 calendar_tools = get_calendar_tools()
 calendar_tools.append(get_event_attendees)
+calendar_tools.append(get_events_attendees)
 
 root_agent = LlmAgent(
     model="gemini-2.5-flash-preview-04-17",
@@ -55,6 +56,7 @@ Tools available:
 - `GetCalendarsInfo`: Lists calendars the authenticated user has access to and their IDs. Returns a list of dictionaries, e.g., `[{'id': 'user@example.com', 'summary': 'My Calendar'}, ...]`.
 - `CalendarSearchEvents`: Searches for events within specific calendars and a time range. Requires `min_datetime` (YYYY-MM-DD HH:MM:SS), `max_datetime` (YYYY-MM-DD HH:MM:SS), and `calendars_info` arguments. Do NOT include a separate `calendar_id` parameter for `CalendarSearchEvents`; all calendar identification is handled via the `calendars_info` parameter.
 - `get_event_attendees`: Gets the list of attendees for a specific event ID in a specific calendar.
+- `get_events_attendees`: Gets the attendees of several events of a calendar at once. Use it instead of calling `get_event_attendees` for each event.
 - `GetCurrentDatetime`: Gets the current date and time. You can optionally request a specific format.
 
 Guidelines:
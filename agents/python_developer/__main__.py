@@ -80,6 +80,9 @@ def main(host: str, port: int):
             task_manager=task_manager,
             host=host,
             port=port,
+            # The code executor is stateful, so tasks run one at a time.
+            max_in_flight_tasks=1,
+            max_queued_tasks=4,
             # Other A2AServer options like base_path, jwks_url if needed
         )
         
@@ -0,0 +1,140 @@
+"""Benchmarks ShardedCache against the original single-lock cache.
+
+Runs a read-heavy mix of get and set calls (90% reads by default) over a
+fixed key space, once from several threads and once from coroutines on one
+event loop, and prints the operations per second of each cache.
+
+    python -m benchmarks.cache_benchmark --threads 8 --ops 200000
+"""
+
+import argparse
+import asyncio
+import random
+import threading
+import time
+
+from typing import Any
+
+from common.utils.in_memory_cache import ShardedCache
+
+
+class BaselineCache:
+    """The cache ShardedCache replaced: one lock, no bound, lazy expiry."""
+
+    def __init__(self):
+        self._cache_data: dict[str, Any] = {}
+        self._ttl: dict[str, float] = {}
+        self._data_lock = threading.Lock()
+
+    def set(self, key: str, value: Any, ttl: int | None = None) -> None:
+        with self._data_lock:
+            self._cache_data[key] = value
+            if ttl is not None:
+                self._ttl[key] = time.time() + ttl
+            elif key in self._ttl:
+                del self._ttl[key]
+
+    def get(self, key: str, default: Any = None) -> Any:
+        with self._data_lock:
+            if key in self._ttl and time.time() > self._ttl[key]:
+                del self._cache_data[key]
+                del self._ttl[key]
+                return default
+            return self._cache_data.get(key, default)
+
+
+def _workload(ops: int, keys: int, read_ratio: float, seed: int):
+    rng = random.Random(seed)
+    return [
+        (rng.random() < read_ratio, f'key-{rng.randrange(keys)}')
+        for _ in range(ops)
+    ]
+
+
+def _run(cache, workload, ttl):
+    for is_read, key in workload:
+        if is_read:
+            cache.get(key)
+        else:
+            cache.set(key, key, ttl=ttl)
+
+
+def bench_threads(cache, args) -> float:
+    per_thread = args.ops // args.threads
+    workloads = [
+        _workload(per_thread, args.keys, args.read_ratio, seed)
+        for seed in range(args.threads)
+    ]
+    threads = [
+        threading.Thread(target=_run, args=(cache, workload, args.ttl))
+        for workload in workloads
+    ]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return per_thread * args.threads / (time.perf_counter() - start)
+
+
+def bench_asyncio(cache, args) -> float:
+    per_task = args.ops // args.tasks
+    workloads = [
+        _workload(per_task, args.keys, args.read_ratio, seed)
+        for seed in range(args.tasks)
+    ]
+
+    async def run(workload):
+        # Yields to the loop every 100 operations, as a handler would.
+        for i, (is_read, key) in enumerate(workload):
+            if is_read:
+                cache.get(key)
+            else:
+                cache.set(key, key, ttl=args.ttl)
+            if i % 100 == 0:
+                await asyncio.sleep(0)
+
+    async def main():
+        start = time.perf_counter()
+        await asyncio.gather(*(run(workload) for workload in workloads))
+        return per_task * args.tasks / (time.perf_counter() - start)
+
+    return asyncio.run(main())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--ops', type=int, default=200_000)
+    parser.add_argument('--keys', type=int, default=10_000)
+    parser.add_argument('--read-ratio', type=float, default=0.9)
+    parser.add_argument('--ttl', type=float, default=300.0)
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--tasks', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    caches = {
+        'baseline': BaselineCache,
+        'sharded, 1 shard': lambda: ShardedCache(num_shards=1),
+        'sharded, 16 shards': lambda: ShardedCache(num_shards=16),
+        'sharded, 16 shards, bounded': lambda: ShardedCache(
+            num_shards=16, max_entries=args.keys // 2
+        ),
+    }
+    print(
+        f'{args.ops} ops over {args.keys} keys,'
+        f' {args.read_ratio:.0%} reads, best of {args.repeat}'
+    )
+    print(f'{"cache":<30}{"threads ops/s":>16}{"asyncio ops/s":>16}')
+    for name, factory in caches.items():
+        threaded = max(
+            bench_threads(factory(), args) for _ in range(args.repeat)
+        )
+        in_loop = max(
+            bench_asyncio(factory(), args) for _ in range(args.repeat)
+        )
+        print(f'{name:<30}{threaded:>16,.0f}{in_loop:>16,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+"""Benchmarks A2AClient RPC latency against a local A2AServer.
+
+Sends tasks/send and tasks/get requests one after another, either through
+one A2AClient that keeps its pooled connection, or through a new client
+per call as A2AClient did before it pooled connections, and prints the
+latency percentiles of each.
+
+    python -m benchmarks.client_benchmark --calls 500
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from common.client import A2AClient
+from common.server import A2AServer, ADKTaskManager
+
+from .utils import EchoAgentWrapper, make_card, send_params, serve_in_process
+
+
+async def timed_calls(url: str, method: str, calls: int, pooled: bool):
+    latencies = []
+    async with A2AClient(url=url) as shared_client:
+        await shared_client.send_task(send_params('warm-up'))
+        for i in range(calls):
+            client = shared_client if pooled else A2AClient(url=url)
+            start = time.perf_counter()
+            if method == 'tasks/send':
+                await client.send_task(send_params(f'{pooled}-{i}'))
+            else:
+                await client.get_task({'id': 'warm-up'})
+            latencies.append(time.perf_counter() - start)
+            if not pooled:
+                await client.aclose()
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=500)
+    args = parser.parse_args()
+
+    server = A2AServer(
+        agent_card=make_card('http://127.0.0.1/'),
+        task_manager=ADKTaskManager(EchoAgentWrapper()),
+    )
+    url, stop = serve_in_process(server.app)
+    try:
+        print(f'{args.calls} sequential calls, latency in ms')
+        print(f'{"method":<12}{"client":<18}{"p50":>8}{"p95":>8}{"mean":>8}')
+        for method in ('tasks/send', 'tasks/get'):
+            for pooled, name in ((False, 'new per call'), (True, 'pooled')):
+                latencies = asyncio.run(
+                    timed_calls(url, method, args.calls, pooled)
+                )
+                latencies.sort()
+                print(
+                    f'{method:<12}{name:<18}'
+                    f'{latencies[len(latencies) // 2] * 1000:>8.2f}'
+                    f'{latencies[int(len(latencies) * 0.95)] * 1000:>8.2f}'
+                    f'{statistics.fmean(latencies) * 1000:>8.2f}'
+                )
+    finally:
+        stop()
+
+
+if __name__ == '__main__':
+    main()
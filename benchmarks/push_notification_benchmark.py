@@ -0,0 +1,125 @@
+"""Benchmarks push notification throughput for each signing algorithm.
+
+Measures how many notification tokens per second a sender signs, and how
+many notifications per second a PushNotificationDeliveryQueue delivers
+to a local webhook that verifies each of them with a
+PushNotificationReceiverAuth.
+
+    python -m benchmarks.push_notification_benchmark --notifications 1000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import time
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+
+from common.utils.push_notification_auth import (
+    SIGNING_KEY_PARAMS,
+    PushNotificationDeliveryQueue,
+    PushNotificationReceiverAuth,
+    PushNotificationSenderAuth,
+)
+
+from .utils import serve_in_process
+
+
+def task_data(i: int) -> dict:
+    return {
+        'id': f'task-{i}',
+        'sessionId': 'benchmark',
+        'status': {
+            'state': 'completed',
+            'message': {
+                'role': 'agent',
+                'parts': [{'type': 'text', 'text': 'done ' * 20}],
+            },
+        },
+    }
+
+
+def bench_signing(sender_auth: PushNotificationSenderAuth, count: int):
+    # Every body is different, as no token would be reused from the cache.
+    digests = [
+        hashlib.sha256(
+            sender_auth._serialize_request_body(task_data(i))
+        ).hexdigest()
+        for i in range(count)
+    ]
+    start = time.perf_counter()
+    for digest in digests:
+        sender_auth._sign(digest)
+    return count / (time.perf_counter() - start)
+
+
+def webhook_app(sender_auth: PushNotificationSenderAuth) -> Starlette:
+    receiver_auth = PushNotificationReceiverAuth()
+
+    async def on_notification(request: Request) -> Response:
+        if receiver_auth.jwks_url is None:
+            await receiver_auth.load_jwks(str(request.url_for('jwks')))
+        if not await receiver_auth.verify_push_notification(request):
+            return Response(status_code=401)
+        return Response(status_code=204)
+
+    app = Starlette()
+    app.add_route(
+        '/jwks.json',
+        sender_auth.handle_jwks_endpoint,
+        methods=['GET'],
+        name='jwks',
+    )
+    app.add_route('/notify', on_notification, methods=['POST'])
+    return app
+
+
+async def bench_delivery(
+    sender_auth: PushNotificationSenderAuth, url: str, count: int
+) -> tuple[float, dict]:
+    # Warms up the webhook, which fetches the JWKS on its first request.
+    queue = PushNotificationDeliveryQueue(sender_auth, max_pending=count)
+    queue.enqueue(url, task_data(-1))
+    await queue.aclose()
+    queue = PushNotificationDeliveryQueue(sender_auth, max_pending=count)
+    start = time.perf_counter()
+    for i in range(count):
+        queue.enqueue(url, task_data(i))
+    await queue.aclose(timeout=None)
+    return count / (time.perf_counter() - start), queue.metrics()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--notifications', type=int, default=1000)
+    args = parser.parse_args()
+
+    print(f'{args.notifications} notifications per algorithm')
+    print(
+        f'{"algorithm":<10}{"signed/s":>10}{"delivered/s":>13}'
+        f'{"failed":>8}{"p95 ms":>8}'
+    )
+    for algorithm in SIGNING_KEY_PARAMS:
+        sender_auth = PushNotificationSenderAuth(algorithm=algorithm)
+        sender_auth.generate_jwk()
+        signed = bench_signing(sender_auth, args.notifications)
+        base_url, stop = serve_in_process(webhook_app(sender_auth))
+        try:
+            delivered, metrics = asyncio.run(
+                bench_delivery(
+                    sender_auth, f'{base_url}notify', args.notifications
+                )
+            )
+        finally:
+            stop()
+        print(
+            f'{algorithm:<10}{signed:>10,.0f}{delivered:>13,.0f}'
+            f'{metrics["failed_attempts"]:>8}'
+            f'{metrics["latency_p95"] * 1000:>8.0f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
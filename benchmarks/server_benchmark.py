@@ -0,0 +1,140 @@
+"""Benchmarks A2AServer requests per second for each JSON-RPC method.
+
+Calls the server's ASGI app directly, without a network in between, so
+that only parsing, dispatch, the task manager and serialization are
+timed. The agent answers immediately.
+
+    python -m benchmarks.server_benchmark --requests 2000
+"""
+
+import argparse
+import asyncio
+import json
+import time
+
+from typing import Any
+
+from common.server import A2AServer, ADKTaskManager
+
+from .utils import EchoAgentWrapper, make_card, send_params
+
+
+def rpc(method: str, params: dict[str, Any], request_id: int = 1) -> dict:
+    return {
+        'jsonrpc': '2.0',
+        'id': request_id,
+        'method': method,
+        'params': params,
+    }
+
+
+async def call(app, body: bytes) -> tuple[int, bytes]:
+    """Posts a body to an ASGI app and returns the status and response."""
+    scope = {
+        'type': 'http',
+        'asgi': {'version': '3.0'},
+        'http_version': '1.1',
+        'method': 'POST',
+        'scheme': 'http',
+        'path': '/',
+        'raw_path': b'/',
+        'query_string': b'',
+        'root_path': '',
+        'headers': [(b'content-type', b'application/json')],
+        'client': ('127.0.0.1', 1234),
+        'server': ('127.0.0.1', 80),
+    }
+    sent = False
+    done = asyncio.Event()
+    status = 0
+    chunks = []
+
+    async def receive():
+        nonlocal sent
+        if not sent:
+            sent = True
+            return {'type': 'http.request', 'body': body, 'more_body': False}
+        await done.wait()
+        return {'type': 'http.disconnect'}
+
+    async def send(message):
+        nonlocal status
+        if message['type'] == 'http.response.start':
+            status = message['status']
+        elif message['type'] == 'http.response.body':
+            chunks.append(message.get('body', b''))
+            if not message.get('more_body', False):
+                done.set()
+
+    await app(scope, receive, send)
+    return status, b''.join(chunks)
+
+
+def requests_by_method(task_id: str) -> dict[str, Any]:
+    """The request timed for each method, starting `task_id` if it sends."""
+    return {
+        'tasks/send': rpc('tasks/send', send_params(task_id)),
+        'tasks/sendSubscribe': rpc('tasks/sendSubscribe', send_params(task_id)),
+        'tasks/get': rpc('tasks/get', {'id': 'existing'}),
+        'tasks/cancel': rpc('tasks/cancel', {'id': 'existing'}),
+        'tasks/pushNotification/set': rpc(
+            'tasks/pushNotification/set',
+            {
+                'id': 'existing',
+                'pushNotificationConfig': {'url': 'http://127.0.0.1/notify'},
+            },
+        ),
+        'tasks/pushNotification/get': rpc(
+            'tasks/pushNotification/get', {'id': 'existing'}
+        ),
+        'tasks/resubscribe': rpc('tasks/resubscribe', {'id': 'existing'}),
+        'batch of 10 tasks/get': [
+            rpc('tasks/get', {'id': 'existing'}, request_id=n)
+            for n in range(10)
+        ],
+    }
+
+
+async def bench(args) -> dict[str, float]:
+    server = A2AServer(
+        agent_card=make_card('http://127.0.0.1/'),
+        task_manager=ADKTaskManager(EchoAgentWrapper(updates=0)),
+    )
+    seed = json.dumps(rpc('tasks/send', send_params('existing'))).encode()
+    results = {}
+    for method in requests_by_method('existing'):
+        best = 0.0
+        for round_ in range(args.repeat):
+            # Every round sends new tasks, and those may have evicted the
+            # task the other methods work on.
+            bodies = [
+                json.dumps(
+                    requests_by_method(f'{round_}-{i}')[method]
+                ).encode()
+                for i in range(args.requests)
+            ]
+            await call(server.app, seed)
+            start = time.perf_counter()
+            for body in bodies:
+                await call(server.app, body)
+            elapsed = time.perf_counter() - start
+            best = max(best, args.requests / elapsed)
+        results[method] = best
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--requests', type=int, default=2000)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    results = asyncio.run(bench(args))
+    print(f'{args.requests} requests per method, best of {args.repeat}')
+    print(f'{"method":<30}{"req/s":>10}')
+    for method, rate in results.items():
+        print(f'{method:<30}{rate:>10,.0f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""Helpers shared by the benchmarks."""
+
+import asyncio
+import multiprocessing
+import socket
+
+from collections.abc import AsyncIterable, Callable
+from typing import Any
+
+from common.types import AgentCapabilities, AgentCard
+
+
+class EchoAgentWrapper:
+    """An AgentWrapper that answers at once, so only A2A overhead is timed.
+
+    `stream` yields `updates` intermediate items before the answer.
+    """
+
+    SUPPORTED_CONTENT_TYPES = ['text', 'text/plain']
+
+    def __init__(self, updates: int = 3):
+        self.updates = updates
+
+    async def invoke(self, query: str, session_id: str) -> str:
+        return query
+
+    async def stream(
+        self, query: str, session_id: str
+    ) -> AsyncIterable[dict[str, Any]]:
+        for i in range(self.updates):
+            await asyncio.sleep(0)
+            yield {'is_task_complete': False, 'updates': f'step {i}'}
+        yield {'is_task_complete': True, 'content': query}
+
+
+def make_card(url: str) -> AgentCard:
+    return AgentCard(
+        name='Echo Agent',
+        url=url,
+        version='1.0.0',
+        capabilities=AgentCapabilities(streaming=True),
+        skills=[],
+    )
+
+
+def send_params(task_id: str, text: str = 'hello') -> dict[str, Any]:
+    return {
+        'id': task_id,
+        'sessionId': 'benchmark',
+        'message': {'role': 'user', 'parts': [{'type': 'text', 'text': text}]},
+    }
+
+
+def _serve(config, sock: socket.socket):
+    import uvicorn
+
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def serve_in_process(app) -> tuple[str, Callable[[], None]]:
+    """Serves an ASGI app with uvicorn from a forked process.
+
+    A server in its own process does not compete with the benchmark for
+    the GIL, which would distort latencies.
+
+    Returns:
+      The base URL of the server and a function that stops it.
+    """
+    import uvicorn
+
+    from common.server.utils import create_listening_socket
+
+    # Listening before the fork, so requests queue until the server is up.
+    sock = create_listening_socket('127.0.0.1', 0)
+    port = sock.getsockname()[1]
+    config = uvicorn.Config(app, log_level='warning')
+    process = multiprocessing.get_context('fork').Process(
+        target=_serve, args=(config, sock), daemon=True
+    )
+    process.start()
+
+    def stop():
+        process.terminate()
+        process.join()
+        sock.close()
+
+    return f'http://127.0.0.1:{port}/', stop
@@ -1,4 +1,5 @@
 import json
+import time
 
 import httpx
 
@@ -6,18 +7,93 @@ from common.types import (
     A2AClientJSONError,
     AgentCard,
 )
+from common.utils.disk_cache import DiskCache
 
 
 class A2ACardResolver:
-    def __init__(self, base_url, agent_card_path='/.well-known/agent.json'):
+    """Fetches the agent card published by an A2A server.
+
+    With a `cache`, the last fetched card is kept on disk together with its
+    ETag. It can be read back without any network access through
+    `get_cached_agent_card`, and later fetches are conditional GETs that the
+    server answers with an empty 304 when the card has not changed.
+    """
+
+    def __init__(
+        self,
+        base_url,
+        agent_card_path='/.well-known/agent.json',
+        timeout: float | None = 10.0,
+        cache: DiskCache | None = None,
+    ):
         self.base_url = base_url.rstrip('/')
         self.agent_card_path = agent_card_path.lstrip('/')
+        self.timeout = timeout
+        self.cache = cache
+
+    @property
+    def card_url(self) -> str:
+        return self.base_url + '/' + self.agent_card_path
+
+    def get_cached_agent_card(self) -> AgentCard | None:
+        """Returns the card from the on-disk cache, without fetching it."""
+        entry = self._get_cache_entry()
+        return AgentCard(**entry['card']) if entry else None
 
     def get_agent_card(self) -> AgentCard:
-        with httpx.Client() as client:
-            response = client.get(self.base_url + '/' + self.agent_card_path)
-            response.raise_for_status()
-            try:
-                return AgentCard(**response.json())
-            except json.JSONDecodeError as e:
-                raise A2AClientJSONError(str(e)) from e
+        entry = self._get_cache_entry()
+        with httpx.Client(timeout=self.timeout) as client:
+            response = client.get(
+                self.card_url, headers=self._conditional_headers(entry)
+            )
+            return self._parse_card(response, entry)
+
+    async def aget_agent_card(
+        self, client: httpx.AsyncClient | None = None
+    ) -> AgentCard:
+        """Fetches the agent card without blocking the event loop.
+
+        An existing client can be passed in to share its connection pool.
+        """
+        entry = self._get_cache_entry()
+        headers = self._conditional_headers(entry)
+        if client is None:
+            async with httpx.AsyncClient(timeout=self.timeout) as client:
+                response = await client.get(self.card_url, headers=headers)
+        else:
+            response = await client.get(
+                self.card_url, headers=headers, timeout=self.timeout
+            )
+        return self._parse_card(response, entry)
+
+    def _get_cache_entry(self) -> dict | None:
+        if self.cache is None:
+            return None
+        return self.cache.get(self.card_url)
+
+    def _conditional_headers(self, entry: dict | None) -> dict[str, str]:
+        if entry and entry.get('etag'):
+            return {'If-None-Match': entry['etag']}
+        return {}
+
+    def _parse_card(
+        self, response: httpx.Response, entry: dict | None
+    ) -> AgentCard:
+        if response.status_code == 304 and entry:
+            return AgentCard(**entry['card'])
+        response.raise_for_status()
+        try:
+            card_data = response.json()
+        except json.JSONDecodeError as e:
+            raise A2AClientJSONError(str(e)) from e
+        card = AgentCard(**card_data)
+        if self.cache is not None:
+            self.cache.set(
+                self.card_url,
+                {
+                    'etag': response.headers.get('etag'),
+                    'fetched_at': time.time(),
+                    'card': card_data,
+                },
+            )
+        return card
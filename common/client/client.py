@@ -6,7 +6,7 @@ from typing import Any
 import httpx
 
 from httpx._types import TimeoutTypes
-from httpx_sse import connect_sse
+from httpx_sse import aconnect_sse
 
 from common.types import (
     A2AClientHTTPError,
@@ -18,22 +18,50 @@ from common.types import (
     GetTaskPushNotificationResponse,
     GetTaskRequest,
     GetTaskResponse,
+    InternalError,
     JSONRPCRequest,
+    JSONRPCResponse,
     SendTaskRequest,
     SendTaskResponse,
     SendTaskStreamingRequest,
     SendTaskStreamingResponse,
     SetTaskPushNotificationRequest,
     SetTaskPushNotificationResponse,
+    TaskResubscriptionRequest,
 )
 
 
+DEFAULT_LIMITS = httpx.Limits(
+    max_connections=100, max_keepalive_connections=20, keepalive_expiry=30.0
+)
+
+# The response type of each request type that can be batched.
+BATCH_RESPONSE_TYPES: dict[type[JSONRPCRequest], type[JSONRPCResponse]] = {
+    SendTaskRequest: SendTaskResponse,
+    GetTaskRequest: GetTaskResponse,
+    CancelTaskRequest: CancelTaskResponse,
+    SetTaskPushNotificationRequest: SetTaskPushNotificationResponse,
+    GetTaskPushNotificationRequest: GetTaskPushNotificationResponse,
+}
+
+
 class A2AClient:
+    """JSON-RPC client for an A2A server.
+
+    The client keeps one pooled `httpx.AsyncClient` for its lifetime so
+    that RPCs reuse keep-alive connections instead of paying connection
+    setup every call. Use it as an async context manager or call `aclose`
+    when done. `http2=True` requires the `h2` package.
+    """
+
     def __init__(
         self,
         agent_card: AgentCard = None,
         url: str = None,
         timeout: TimeoutTypes = 60.0,
+        limits: httpx.Limits = DEFAULT_LIMITS,
+        http2: bool = False,
+        http_client: httpx.AsyncClient | None = None,
     ):
         if agent_card:
             self.url = agent_card.url
@@ -42,6 +70,31 @@ class A2AClient:
         else:
             raise ValueError('Must provide either agent_card or url')
         self.timeout = timeout
+        self.limits = limits
+        self.http2 = http2
+        self._http_client = http_client
+        self._owns_http_client = http_client is None
+
+    async def __aenter__(self) -> 'A2AClient':
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.aclose()
+
+    async def aclose(self):
+        """Closes the pooled connections, unless the client was injected."""
+        if self._http_client is not None and self._owns_http_client:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        # Created lazily so the pool belongs to the event loop that uses it.
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                timeout=self.timeout, limits=self.limits, http2=self.http2
+            )
+            self._owns_http_client = True
+        return self._http_client
 
     async def send_task(self, payload: dict[str, Any]) -> SendTaskResponse:
         request = SendTaskRequest(params=payload)
@@ -51,31 +104,103 @@ class A2AClient:
         self, payload: dict[str, Any]
     ) -> AsyncIterable[SendTaskStreamingResponse]:
         request = SendTaskStreamingRequest(params=payload)
-        with httpx.Client(timeout=None) as client:
-            with connect_sse(
-                client, 'POST', self.url, json=request.model_dump()
+        async for response in self._send_streaming_request(request):
+            yield response
+
+    async def resubscribe_task(
+        self, payload: dict[str, Any]
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        request = TaskResubscriptionRequest(params=payload)
+        async for response in self._send_streaming_request(request):
+            yield response
+
+    async def _send_streaming_request(
+        self, request: JSONRPCRequest
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        client = self._get_http_client()
+        try:
+            async with aconnect_sse(
+                client, 'POST', self.url, json=request.model_dump(), timeout=None
             ) as event_source:
-                try:
-                    for sse in event_source.iter_sse():
-                        yield SendTaskStreamingResponse(**json.loads(sse.data))
-                except json.JSONDecodeError as e:
-                    raise A2AClientJSONError(str(e)) from e
-                except httpx.RequestError as e:
-                    raise A2AClientHTTPError(400, str(e)) from e
+                response = event_source.response
+                if not response.headers.get('content-type', '').startswith(
+                    'text/event-stream'
+                ):
+                    # Errors are answered with a plain JSON-RPC response.
+                    await response.aread()
+                    if not response.is_success and not response.content:
+                        response.raise_for_status()
+                    yield SendTaskStreamingResponse(**response.json())
+                    return
+
+                async for sse in event_source.aiter_sse():
+                    yield SendTaskStreamingResponse(**json.loads(sse.data))
+        except json.JSONDecodeError as e:
+            raise A2AClientJSONError(str(e)) from e
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+        except httpx.RequestError as e:
+            raise A2AClientHTTPError(400, str(e)) from e
 
     async def _send_request(self, request: JSONRPCRequest) -> dict[str, Any]:
-        async with httpx.AsyncClient() as client:
-            try:
-                # Image generation could take time, adding timeout
-                response = await client.post(
-                    self.url, json=request.model_dump(), timeout=self.timeout
-                )
-                response.raise_for_status()
-                return response.json()
-            except httpx.HTTPStatusError as e:
-                raise A2AClientHTTPError(e.response.status_code, str(e)) from e
-            except json.JSONDecodeError as e:
-                raise A2AClientJSONError(str(e)) from e
+        return await self._post(request.model_dump())
+
+    async def _post(self, payload: Any) -> Any:
+        client = self._get_http_client()
+        try:
+            # Image generation could take time, adding timeout
+            response = await client.post(
+                self.url, json=payload, timeout=self.timeout
+            )
+            response.raise_for_status()
+            return response.json()
+        except httpx.HTTPStatusError as e:
+            raise A2AClientHTTPError(e.response.status_code, str(e)) from e
+        except json.JSONDecodeError as e:
+            raise A2AClientJSONError(str(e)) from e
+
+    async def batch(
+        self, requests: list[JSONRPCRequest]
+    ) -> list[JSONRPCResponse]:
+        """Sends several requests in a single JSON-RPC batch.
+
+        Streaming requests cannot be batched. Returns the responses in the
+        order of the requests, typed after them, e.g. a GetTaskResponse for
+        a GetTaskRequest.
+        """
+        if not requests:
+            return []
+        ids = [request.id for request in requests]
+        if len(set(ids)) != len(ids):
+            raise ValueError('Batched requests must have distinct ids')
+        payload = await self._post([request.model_dump() for request in requests])
+        if not isinstance(payload, list):
+            # The whole batch was rejected.
+            raise A2AClientJSONError(f'Batch request failed: {payload}')
+        responses = {response.get('id'): response for response in payload}
+        results = []
+        for request in requests:
+            response_type = BATCH_RESPONSE_TYPES.get(
+                type(request), JSONRPCResponse
+            )
+            response = responses.get(request.id)
+            if response is None:
+                response = {
+                    'id': request.id,
+                    'error': InternalError(
+                        message='Missing response in batch'
+                    ).model_dump(),
+                }
+            results.append(response_type(**response))
+        return results
+
+    async def get_tasks(
+        self, payloads: list[dict[str, Any]]
+    ) -> list[GetTaskResponse]:
+        """Gets several tasks in one round-trip."""
+        return await self.batch(
+            [GetTaskRequest(params=payload) for payload in payloads]
+        )
 
     async def get_task(self, payload: dict[str, Any]) -> GetTaskResponse:
         request = GetTaskRequest(params=payload)
@@ -1,5 +1,16 @@
+from .adk_task_manager import ADKTaskManager, AgentWrapper
 from .server import A2AServer
 from .task_manager import InMemoryTaskManager, TaskManager
+from .task_store import InMemoryTaskStore, SQLiteTaskStore, TaskStore
 
 
-__all__ = ['A2AServer', 'InMemoryTaskManager', 'TaskManager']
+__all__ = [
+    'A2AServer',
+    'ADKTaskManager',
+    'AgentWrapper',
+    'InMemoryTaskManager',
+    'InMemoryTaskStore',
+    'SQLiteTaskStore',
+    'TaskManager',
+    'TaskStore',
+]
@@ -0,0 +1,297 @@
+import logging
+
+from collections.abc import AsyncIterable
+from typing import Any, Protocol
+from urllib.parse import urlparse
+
+from common.server import utils
+from common.server.task_manager import InMemoryTaskManager
+from common.types import (
+    Artifact,
+    DataPart,
+    InternalError,
+    InvalidParamsError,
+    JSONRPCError,
+    JSONRPCResponse,
+    Message,
+    PushNotificationConfig,
+    PushNotificationNotSupportedError,
+    SendTaskRequest,
+    SendTaskResponse,
+    SendTaskStreamingRequest,
+    SendTaskStreamingResponse,
+    Task,
+    TaskArtifactUpdateEvent,
+    TaskSendParams,
+    TaskState,
+    TaskStatus,
+    TaskStatusUpdateEvent,
+    TextPart,
+)
+
+
+logger = logging.getLogger(__name__)
+
+
+class AgentWrapper(Protocol):
+    """The interface an agent exposes to be served by an ADKTaskManager.
+
+    `stream` yields dicts with an `is_task_complete` flag, plus `updates`
+    text for intermediate items or the final `content` (text or a dict of
+    structured data) for the last one.
+    """
+
+    SUPPORTED_CONTENT_TYPES: list[str]
+
+    async def invoke(self, query: str, session_id: str) -> str: ...
+
+    def stream(
+        self, query: str, session_id: str
+    ) -> AsyncIterable[dict[str, Any]]: ...
+
+
+class ADKTaskManager(InMemoryTaskManager):
+    """Serves an ADK agent wrapper over A2A.
+
+    Keyword arguments are passed on to InMemoryTaskManager, e.g. to pick
+    the task store.
+    """
+
+    def __init__(self, agent_wrapper: AgentWrapper, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.agent_wrapper = agent_wrapper
+
+    async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
+        error_resp = self._validate_request(request)
+        if error_resp:
+            return error_resp
+
+        await self.upsert_task(request.params)
+        response = await self.run_cancelable(
+            request.params.id, self._invoke(request)
+        )
+        if response is None:
+            # The task was canceled through tasks/cancel while running.
+            task = self.tasks.get(request.params.id)
+            return SendTaskResponse(
+                id=request.id,
+                result=self.append_task_history(
+                    task, request.params.historyLength
+                ),
+            )
+        return response
+
+    async def on_send_task_subscribe(
+        self, request: SendTaskStreamingRequest
+    ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
+        error_resp = self._validate_request(request)
+        if error_resp:
+            return error_resp
+
+        await self.upsert_task(request.params)
+        # The generator reports its own errors as JSONRPCResponses. It runs
+        # in the background so that a dropped client can resubscribe.
+        return await self.start_streaming_task(
+            request, self._stream_generator(request)
+        )
+
+    async def _stream_generator(
+        self, request: SendTaskStreamingRequest
+    ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
+        task_send_params: TaskSendParams = request.params
+        query = self._get_user_query(task_send_params)
+        if query is None:
+            yield JSONRPCResponse(
+                id=request.id,
+                error=InternalError(
+                    message='Invalid input: Only text queries are supported.'
+                ),
+            )
+            return
+
+        try:
+            async for item in self.agent_wrapper.stream(
+                query, task_send_params.sessionId
+            ):
+                is_task_complete = item['is_task_complete']
+                artifacts = None
+
+                if not is_task_complete:
+                    task_state = TaskState.WORKING
+                    parts = [TextPart(text=str(item.get('updates', '')))]
+                else:
+                    task_state = TaskState.COMPLETED
+                    content = item.get('content', '')
+                    if isinstance(content, dict):
+                        parts = [DataPart(data=content)]
+                    else:
+                        parts = [TextPart(text=str(content))]
+                    artifacts = [Artifact(parts=parts, index=0, append=False)]
+
+                message = Message(role='agent', parts=parts)
+                task_status = TaskStatus(state=task_state, message=message)
+                await self._update_store(
+                    task_send_params.id, task_status, artifacts
+                )
+
+                yield SendTaskStreamingResponse(
+                    id=request.id,
+                    result=TaskStatusUpdateEvent(
+                        id=task_send_params.id, status=task_status, final=False
+                    ),
+                )
+
+                for artifact in artifacts or []:
+                    yield SendTaskStreamingResponse(
+                        id=request.id,
+                        result=TaskArtifactUpdateEvent(
+                            id=task_send_params.id, artifact=artifact
+                        ),
+                    )
+
+                if is_task_complete:
+                    # The final update only carries the state.
+                    yield SendTaskStreamingResponse(
+                        id=request.id,
+                        result=TaskStatusUpdateEvent(
+                            id=task_send_params.id,
+                            status=TaskStatus(state=task_status.state),
+                            final=True,
+                        ),
+                    )
+
+        except Exception as e:
+            logger.error(
+                f'An error occurred while streaming the response: {e}',
+                exc_info=True,
+            )
+            yield JSONRPCResponse(
+                id=request.id,
+                error=InternalError(
+                    message=f'An error occurred while streaming the response: {e}'
+                ),
+            )
+
+    def _validate_request(
+        self, request: SendTaskRequest | SendTaskStreamingRequest
+    ) -> JSONRPCResponse | None:
+        task_send_params: TaskSendParams = request.params
+        if not utils.are_modalities_compatible(
+            task_send_params.acceptedOutputModes,
+            self.agent_wrapper.SUPPORTED_CONTENT_TYPES,
+        ):
+            logger.warning(
+                'Unsupported output mode. Received %s, Agent supports %s',
+                task_send_params.acceptedOutputModes,
+                self.agent_wrapper.SUPPORTED_CONTENT_TYPES,
+            )
+            return utils.new_incompatible_types_error(request.id)
+        if task_send_params.pushNotification is not None:
+            error = self._validate_push_notification(
+                task_send_params.pushNotification
+            )
+            if error is not None:
+                return JSONRPCResponse(id=request.id, error=error)
+        if not task_send_params.message or not task_send_params.message.parts:
+            logger.warning('Received task with no message parts.')
+            return JSONRPCResponse(
+                id=request.id,
+                error=InternalError(message='Task message parts are missing.'),
+            )
+        if not any(
+            isinstance(part, TextPart) for part in task_send_params.message.parts
+        ):
+            logger.warning('Received task with no text parts.')
+            return JSONRPCResponse(
+                id=request.id,
+                error=InternalError(message='Only text input is supported.'),
+            )
+        return None
+
+    def _validate_push_notification(
+        self, config: PushNotificationConfig
+    ) -> JSONRPCError | None:
+        if self.push_notifier is None:
+            logger.warning('Received task with push notification unsupported.')
+            return PushNotificationNotSupportedError()
+        if urlparse(config.url).scheme not in ('http', 'https'):
+            logger.warning(f'Invalid push notification URL: {config.url}')
+            return InvalidParamsError(
+                message='Push notification URL must be an http(s) URL'
+            )
+        return None
+
+    async def _update_store(
+        self, task_id: str, status: TaskStatus, artifacts: list[Artifact] | None
+    ) -> Task:
+        """Updates the task status and artifacts.
+
+        Unlike update_store, intermediate status messages are not appended to
+        the task history, which would otherwise grow with every streamed item.
+        """
+        async with self.task_lock(task_id):
+            task = self.tasks.get(task_id)
+            if task is None:
+                logger.error(f'Task {task_id} not found for updating.')
+                raise ValueError(
+                    f'Task {task_id} not found during update.'
+                    ' Ensure upsert_task was called.'
+                )
+
+            previous_state = task.status.state
+            task.status = status
+            if artifacts:
+                if task.artifacts is None:
+                    task.artifacts = []
+                task.artifacts.extend(artifacts)
+            self.tasks.put(task)
+            self.notify_state_transition(task, previous_state)
+            return task
+
+    async def _invoke(self, request: SendTaskRequest) -> SendTaskResponse:
+        task_send_params: TaskSendParams = request.params
+        query = self._get_user_query(task_send_params)
+        if query is None:
+            return SendTaskResponse(
+                id=request.id,
+                error=InternalError(
+                    message='Invalid input: Only text queries are supported.'
+                ),
+            )
+
+        try:
+            result_text = await self.agent_wrapper.invoke(
+                query, task_send_params.sessionId
+            )
+        except Exception as e:
+            logger.error(f'Error invoking agent_wrapper: {e}', exc_info=True)
+            fail_status = TaskStatus(
+                state=TaskState.FAILED,
+                message=Message(
+                    role='agent',
+                    parts=[TextPart(text=f'Agent invocation failed: {e}')],
+                ),
+            )
+            await self._update_store(task_send_params.id, fail_status, None)
+            return SendTaskResponse(
+                id=request.id,
+                error=InternalError(message=f'Error invoking agent: {e}'),
+            )
+
+        parts = [TextPart(text=str(result_text))]
+        task = await self._update_store(
+            task_send_params.id,
+            TaskStatus(
+                state=TaskState.COMPLETED,
+                message=Message(role='agent', parts=parts),
+            ),
+            [Artifact(parts=parts)],
+        )
+        return SendTaskResponse(id=request.id, result=task)
+
+    def _get_user_query(self, task_send_params: TaskSendParams) -> str | None:
+        if task_send_params.message and task_send_params.message.parts:
+            for part in task_send_params.message.parts:
+                if isinstance(part, TextPart):
+                    return part.text
+        return None
@@ -0,0 +1,128 @@
+import asyncio
+import math
+import time
+
+from collections import deque
+from typing import Any
+
+
+class AdmissionRejected(Exception):
+    """Raised when a server is too busy to accept another task."""
+
+    def __init__(self, retry_after: int):
+        super().__init__(f'Server busy, retry after {retry_after}s')
+        self.retry_after = retry_after
+
+
+class AdmissionController:
+    """Bounds the number of tasks a server works on at once.
+
+    Up to `max_in_flight` tasks run concurrently. Further tasks wait, in
+    arrival order, in a queue of at most `max_queued` tasks for up to
+    `queue_timeout` seconds. A task that finds the queue full or times out
+    in it is rejected with AdmissionRejected, which carries an estimate of
+    when a slot should be free again.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queued: int = 0,
+        queue_timeout: float = 30.0,
+    ):
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1')
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._admitted = 0
+        self._rejected = 0
+        self._timed_out = 0
+        self._queued_total = 0
+        self._queue_time_total = 0.0
+        self._queue_time_max = 0.0
+        # Exponentially weighted average of how long a task holds its slot.
+        self._avg_task_duration: float | None = None
+
+    async def acquire(self) -> float:
+        """Waits for a slot and returns how long the task was queued.
+
+        Raises:
+          AdmissionRejected: If the queue is full or the wait timed out.
+        """
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self._admitted += 1
+            return 0.0
+        if len(self._waiters) >= self.max_queued:
+            self._rejected += 1
+            raise AdmissionRejected(self.retry_after())
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        start = time.monotonic()
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            if not waiter.done() or waiter.cancelled():
+                self._rejected += 1
+                self._timed_out += 1
+                raise AdmissionRejected(self.retry_after()) from None
+            # The slot was handed over just as the wait timed out.
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # Pass on the slot that was handed to this cancelled waiter.
+                self.release()
+            raise
+        finally:
+            if waiter in self._waiters:
+                self._waiters.remove(waiter)
+
+        queue_time = time.monotonic() - start
+        self._admitted += 1
+        self._queued_total += 1
+        self._queue_time_total += queue_time
+        self._queue_time_max = max(self._queue_time_max, queue_time)
+        return queue_time
+
+    def release(self, task_duration: float | None = None):
+        """Frees a slot, handing it straight to the next queued task if any."""
+        if task_duration is not None:
+            if self._avg_task_duration is None:
+                self._avg_task_duration = task_duration
+            else:
+                self._avg_task_duration += 0.2 * (
+                    task_duration - self._avg_task_duration
+                )
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def retry_after(self) -> int:
+        """Estimates in how many seconds a rejected task could be admitted."""
+        avg_task_duration = self._avg_task_duration or 1.0
+        waiting = len(self._waiters) + 1
+        return max(1, math.ceil(avg_task_duration * waiting / self.max_in_flight))
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            'in_flight': self.in_flight,
+            'queued': len(self._waiters),
+            'max_in_flight': self.max_in_flight,
+            'max_queued': self.max_queued,
+            'admitted': self._admitted,
+            'rejected': self._rejected,
+            'timed_out': self._timed_out,
+            'queue_time_avg': (
+                self._queue_time_total / self._queued_total
+                if self._queued_total
+                else 0.0
+            ),
+            'queue_time_max': self._queue_time_max,
+            'task_duration_avg': self._avg_task_duration,
+        }
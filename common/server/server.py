@@ -1,5 +1,11 @@
+import asyncio
+import hashlib
 import json
 import logging
+import multiprocessing
+import signal
+import socket
+import time
 
 from collections.abc import AsyncIterable
 from typing import Any
@@ -8,30 +14,86 @@ from pydantic import ValidationError
 from sse_starlette.sse import EventSourceResponse
 from starlette.applications import Starlette
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, Response
 
+from common.server.admission import AdmissionController, AdmissionRejected
 from common.server.task_manager import TaskManager
+from common.server.utils import create_listening_socket
 from common.types import (
     A2ARequest,
     AgentCard,
-    CancelTaskRequest,
-    GetTaskPushNotificationRequest,
-    GetTaskRequest,
     InternalError,
     InvalidRequestError,
     JSONParseError,
+    JSONRPCError,
+    JSONRPCRequest,
     JSONRPCResponse,
     SendTaskRequest,
     SendTaskStreamingRequest,
-    SetTaskPushNotificationRequest,
-    TaskResubscriptionRequest,
+    SendTaskStreamingResponse,
+    ServerBusyError,
+    UnsupportedOperationError,
 )
 
 
 logger = logging.getLogger(__name__)
 
 
+# The task manager method handling each JSON-RPC method.
+HANDLERS = {
+    'tasks/get': 'on_get_task',
+    'tasks/send': 'on_send_task',
+    'tasks/sendSubscribe': 'on_send_task_subscribe',
+    'tasks/cancel': 'on_cancel_task',
+    'tasks/pushNotification/set': 'on_set_task_push_notification',
+    'tasks/pushNotification/get': 'on_get_task_push_notification',
+    'tasks/resubscribe': 'on_resubscribe_to_task',
+}
+
+# The methods starting a task, which are subject to admission control.
+ADMITTED_METHODS = frozenset({'tasks/send', 'tasks/sendSubscribe'})
+
+# The methods answered with an event stream, which cannot be batched.
+STREAMING_METHODS = frozenset({'tasks/sendSubscribe', 'tasks/resubscribe'})
+
+
+def _json_response(
+    response: JSONRPCResponse,
+    status_code: int = 200,
+    headers: dict[str, str] | None = None,
+) -> Response:
+    # pydantic encodes straight to JSON bytes, without building a dict.
+    return Response(
+        response.model_dump_json(exclude_none=True),
+        status_code=status_code,
+        headers=headers,
+        media_type='application/json',
+    )
+
+
+def _run_worker(config, sock: socket.socket):
+    import uvicorn
+
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    except KeyboardInterrupt:
+        # Re-raised by uvicorn once it has shut down gracefully.
+        pass
+
+
 class A2AServer:
+    """Serves a task manager over A2A.
+
+    With `max_in_flight_tasks`, at most that many tasks/send and
+    tasks/sendSubscribe requests are worked on at once, and up to
+    `max_queued_tasks` more wait at most `queue_timeout` seconds for a slot.
+    Any others are rejected with a 503 and a Retry-After hint. The limits
+    are advertised in the capabilities of the agent card.
+
+    JSON-RPC batches of up to `max_batch_size` non-streaming requests are
+    processed concurrently and answered in one response.
+    """
+
     def __init__(
         self,
         host='0.0.0.0',
@@ -39,11 +101,23 @@ class A2AServer:
         endpoint='/',
         agent_card: AgentCard = None,
         task_manager: TaskManager = None,
+        card_max_age: int = 300,
+        max_in_flight_tasks: int | None = None,
+        max_queued_tasks: int = 0,
+        queue_timeout: float = 30.0,
+        max_batch_size: int = 100,
     ):
         self.host = host
         self.port = port
         self.endpoint = endpoint
         self.task_manager = task_manager
+        self.card_max_age = card_max_age
+        self.max_batch_size = max_batch_size
+        self.admission: AdmissionController | None = None
+        if max_in_flight_tasks is not None:
+            self.admission = AdmissionController(
+                max_in_flight_tasks, max_queued_tasks, queue_timeout
+            )
         self.agent_card = agent_card
         self.app = Starlette()
         self.app.add_route(
@@ -52,8 +126,17 @@ class A2AServer:
         self.app.add_route(
             '/.well-known/agent.json', self._get_agent_card, methods=['GET']
         )
+        self.app.add_route('/metrics', self._get_metrics, methods=['GET'])
+
+    def start(self, workers: int = 1):
+        """Serves the agent, optionally from several worker processes.
 
-    def start(self):
+        With more than one worker, the server forks `workers` processes that
+        accept connections from one shared listening socket. They only see
+        each other's tasks when the task manager uses a shared task store,
+        such as a SQLiteTaskStore; tasks/cancel and push notification
+        settings still only reach the process running the task.
+        """
         if self.agent_card is None:
             raise ValueError('agent_card is not defined')
 
@@ -62,68 +145,254 @@ class A2AServer:
 
         import uvicorn
 
-        uvicorn.run(self.app, host=self.host, port=self.port)
+        if workers <= 1:
+            uvicorn.run(self.app, host=self.host, port=self.port)
+            return
 
-    def _get_agent_card(self, request: Request) -> JSONResponse:
-        return JSONResponse(self.agent_card.model_dump(exclude_none=True))
+        task_store = getattr(self.task_manager, 'tasks', None)
+        if not getattr(task_store, 'shared', False):
+            logger.warning(
+                'Serving from %d workers without a shared task store: tasks'
+                ' are only visible to the worker that received them',
+                workers,
+            )
+        sock = create_listening_socket(self.host, self.port)
+        sock.set_inheritable(True)
+        config = uvicorn.Config(self.app, host=self.host, port=self.port)
+        context = multiprocessing.get_context('fork')
+        processes = [
+            context.Process(
+                target=_run_worker, args=(config, sock), name=f'a2a-worker-{i}'
+            )
+            for i in range(workers)
+        ]
+        for process in processes:
+            process.start()
+        logger.info(
+            'Serving from %d workers on http://%s:%d',
+            workers,
+            self.host,
+            self.port,
+        )
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            # The workers received the interrupt as well and shut down.
+            signal.signal(signal.SIGINT, signal.SIG_IGN)
+        finally:
+            for process in processes:
+                process.join(timeout=10)
+                if process.is_alive():
+                    process.terminate()
+            sock.close()
+
+    @property
+    def agent_card(self) -> AgentCard | None:
+        return self._agent_card
+
+    @agent_card.setter
+    def agent_card(self, agent_card: AgentCard | None):
+        # The card is served as is on every request, so it is serialized once.
+        if agent_card is not None and self.admission is not None:
+            capabilities = agent_card.capabilities.model_copy(
+                update={
+                    'maxConcurrentTasks': self.admission.max_in_flight,
+                    'maxQueuedTasks': self.admission.max_queued,
+                }
+            )
+            agent_card = agent_card.model_copy(
+                update={'capabilities': capabilities}
+            )
+        self._agent_card = agent_card
+        self._agent_card_bytes = b''
+        self._agent_card_etag = ''
+        if agent_card is not None:
+            self._agent_card_bytes = agent_card.model_dump_json(
+                exclude_none=True
+            ).encode('utf-8')
+            digest = hashlib.sha256(self._agent_card_bytes).hexdigest()
+            self._agent_card_etag = f'"{digest}"'
+
+    def _get_agent_card(self, request: Request) -> Response:
+        headers = {
+            'ETag': self._agent_card_etag,
+            'Cache-Control': f'public, max-age={self.card_max_age}',
+        }
+        if_none_match = request.headers.get('if-none-match', '')
+        if self._agent_card_etag in (
+            tag.strip() for tag in if_none_match.split(',')
+        ):
+            return Response(status_code=304, headers=headers)
+        return Response(
+            self._agent_card_bytes,
+            media_type='application/json',
+            headers=headers,
+        )
+
+    def _get_metrics(self, request: Request) -> JSONResponse:
+        metrics = self.task_manager.get_metrics()
+        if self.admission is not None:
+            metrics = {**metrics, 'admission': self.admission.metrics()}
+        return JSONResponse(metrics)
 
     async def _process_request(self, request: Request):
         try:
-            body = await request.json()
-            json_rpc_request = A2ARequest.validate_python(body)
-
-            if isinstance(json_rpc_request, GetTaskRequest):
-                result = await self.task_manager.on_get_task(json_rpc_request)
-            elif isinstance(json_rpc_request, SendTaskRequest):
-                result = await self.task_manager.on_send_task(json_rpc_request)
-            elif isinstance(json_rpc_request, SendTaskStreamingRequest):
-                result = await self.task_manager.on_send_task_subscribe(
-                    json_rpc_request
-                )
-            elif isinstance(json_rpc_request, CancelTaskRequest):
-                result = await self.task_manager.on_cancel_task(
-                    json_rpc_request
-                )
-            elif isinstance(json_rpc_request, SetTaskPushNotificationRequest):
-                result = await self.task_manager.on_set_task_push_notification(
-                    json_rpc_request
-                )
-            elif isinstance(json_rpc_request, GetTaskPushNotificationRequest):
-                result = await self.task_manager.on_get_task_push_notification(
-                    json_rpc_request
-                )
-            elif isinstance(json_rpc_request, TaskResubscriptionRequest):
-                result = await self.task_manager.on_resubscribe_to_task(
-                    json_rpc_request
-                )
-            else:
-                logger.warning(
-                    f'Unexpected request type: {type(json_rpc_request)}'
-                )
-                raise ValueError(f'Unexpected request type: {type(request)}')
+            body = await request.body()
+            if body.lstrip()[:1] == b'[':
+                return await self._process_batch(json.loads(body))
 
+            # Validating the raw body parses it in the same pass.
+            json_rpc_request = A2ARequest.validate_json(body)
+            result = await self._dispatch(json_rpc_request)
             return self._create_response(result)
 
+        except AdmissionRejected as e:
+            return _json_response(
+                self._busy_response(json_rpc_request, e),
+                status_code=503,
+                headers={'Retry-After': str(e.retry_after)},
+            )
         except Exception as e:
             return self._handle_exception(e)
 
-    def _handle_exception(self, e: Exception) -> JSONResponse:
-        if isinstance(e, json.decoder.JSONDecodeError):
-            json_rpc_error = JSONParseError()
-        elif isinstance(e, ValidationError):
-            json_rpc_error = InvalidRequestError(data=json.loads(e.json()))
-        else:
-            logger.error(f'Unhandled exception: {e}')
-            json_rpc_error = InternalError()
-
-        response = JSONRPCResponse(id=None, error=json_rpc_error)
-        return JSONResponse(
-            response.model_dump(exclude_none=True), status_code=400
+    async def _process_batch(self, batch: list[Any]) -> Response:
+        """Processes a JSON-RPC batch, running its requests concurrently.
+
+        Streaming methods cannot be part of a batch, and are answered with
+        an UnsupportedOperationError.
+        """
+        if not batch or len(batch) > self.max_batch_size:
+            return _json_response(
+                JSONRPCResponse(
+                    id=None,
+                    error=InvalidRequestError(
+                        message=(
+                            'Batch must contain between 1 and'
+                            f' {self.max_batch_size} requests'
+                        )
+                    ),
+                ),
+                status_code=400,
+            )
+        responses = await asyncio.gather(
+            *(self._process_batch_item(item) for item in batch)
+        )
+        return Response(
+            b'[%s]'
+            % b','.join(
+                response.model_dump_json(exclude_none=True).encode('utf-8')
+                for response in responses
+            ),
+            media_type='application/json',
         )
 
+    async def _process_batch_item(self, item: Any) -> JSONRPCResponse:
+        request_id = item.get('id') if isinstance(item, dict) else None
+        try:
+            json_rpc_request = A2ARequest.validate_python(item)
+            if json_rpc_request.method in STREAMING_METHODS:
+                return JSONRPCResponse(
+                    id=request_id,
+                    error=UnsupportedOperationError(
+                        message=(
+                            f'{json_rpc_request.method} cannot be batched'
+                        )
+                    ),
+                )
+            return await self._dispatch(json_rpc_request)
+        except AdmissionRejected as e:
+            return self._busy_response(json_rpc_request, e)
+        except Exception as e:
+            return JSONRPCResponse(
+                id=request_id, error=self._to_json_rpc_error(e)
+            )
+
+    async def _dispatch(
+        self, request: JSONRPCRequest
+    ) -> JSONRPCResponse | AsyncIterable[SendTaskStreamingResponse]:
+        """Hands a request to its task manager handler.
+
+        Raises:
+          AdmissionRejected: If the request would start a task while the
+            server is at capacity.
+        """
+        if self.admission is not None and request.method in ADMITTED_METHODS:
+            return await self._dispatch_admitted(request)
+        handler = getattr(self.task_manager, HANDLERS[request.method])
+        return await handler(request)
+
+    async def _dispatch_admitted(
+        self, request: SendTaskRequest | SendTaskStreamingRequest
+    ) -> JSONRPCResponse | AsyncIterable[SendTaskStreamingResponse]:
+        """Runs a new task once the admission controller has a slot for it."""
+        try:
+            await self.admission.acquire()
+        except AdmissionRejected as e:
+            logger.warning(f'Rejecting task {request.params.id}: {e}')
+            raise
+
+        start = time.monotonic()
+
+        def release():
+            self.admission.release(time.monotonic() - start)
+
+        try:
+            if isinstance(request, SendTaskRequest):
+                result = await self.task_manager.on_send_task(request)
+            else:
+                result = await self.task_manager.on_send_task_subscribe(request)
+        except BaseException:
+            release()
+            raise
+        if not isinstance(result, AsyncIterable):
+            release()
+            return result
+
+        # A streamed task whose work runs in the background keeps running
+        # when its client disconnects, so it holds its slot until that work
+        # is done rather than until the response ends.
+        running_tasks = getattr(self.task_manager, 'running_tasks', {})
+        running_task = running_tasks.get(request.params.id)
+        if running_task is not None and not running_task.done():
+            running_task.add_done_callback(lambda _: release())
+            return result
+
+        async def release_when_done(result):
+            try:
+                async for item in result:
+                    yield item
+            finally:
+                release()
+
+        return release_when_done(result)
+
+    def _busy_response(
+        self, request: JSONRPCRequest, e: AdmissionRejected
+    ) -> JSONRPCResponse:
+        return JSONRPCResponse(
+            id=request.id,
+            error=ServerBusyError(data={'retryAfter': e.retry_after}),
+        )
+
+    def _to_json_rpc_error(self, e: Exception) -> JSONRPCError:
+        if isinstance(e, json.decoder.JSONDecodeError) or (
+            isinstance(e, ValidationError)
+            and any(error['type'] == 'json_invalid' for error in e.errors())
+        ):
+            return JSONParseError()
+        if isinstance(e, ValidationError):
+            return InvalidRequestError(data=json.loads(e.json()))
+        logger.error(f'Unhandled exception: {e}')
+        return InternalError()
+
+    def _handle_exception(self, e: Exception) -> Response:
+        response = JSONRPCResponse(id=None, error=self._to_json_rpc_error(e))
+        return _json_response(response, status_code=400)
+
     def _create_response(
         self, result: Any
-    ) -> JSONResponse | EventSourceResponse:
+    ) -> Response | EventSourceResponse:
         if isinstance(result, AsyncIterable):
 
             async def event_generator(result) -> AsyncIterable[dict[str, str]]:
@@ -132,6 +401,6 @@ class A2AServer:
 
             return EventSourceResponse(event_generator(result))
         if isinstance(result, JSONRPCResponse):
-            return JSONResponse(result.model_dump(exclude_none=True))
+            return _json_response(result)
         logger.error(f'Unexpected result type: {type(result)}')
         raise ValueError(f'Unexpected result type: {type(result)}')
@@ -0,0 +1,181 @@
+import asyncio
+
+from collections import deque
+from enum import Enum
+from typing import Any
+
+from common.types import (
+    JSONRPCError,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatusUpdateEvent,
+)
+
+
+TaskStreamEvent = TaskStatusUpdateEvent | TaskArtifactUpdateEvent | JSONRPCError
+
+SEQUENCE_METADATA_KEY = 'sequence'
+
+
+def get_event_sequence(event: TaskStreamEvent) -> int | None:
+    """Returns the sequence number stamped on an event by a TaskEventLog."""
+    metadata = getattr(event, 'metadata', None)
+    if not metadata:
+        return None
+    return metadata.get(SEQUENCE_METADATA_KEY)
+
+
+def is_last_event(event: TaskStreamEvent) -> bool:
+    """Whether no further events follow this one in a task stream."""
+    if isinstance(event, JSONRPCError):
+        return True
+    return isinstance(event, TaskStatusUpdateEvent) and event.final
+
+
+class TaskEventLog:
+    """A bounded, replayable log of the streaming events of one task.
+
+    Every appended status or artifact event is stamped with a sequence
+    number in its metadata, so that a client whose stream dropped can
+    resubscribe and replay everything after the last event it received.
+    Only the most recent `max_events` events are retained.
+    """
+
+    def __init__(self, max_events: int = 256):
+        self._events: deque[tuple[int, TaskStreamEvent]] = deque(
+            maxlen=max_events
+        )
+        self._next_sequence = 0
+
+    @property
+    def closed(self) -> bool:
+        """Whether the last logged event ended the stream."""
+        return bool(self._events) and is_last_event(self._events[-1][1])
+
+    def append(self, event: TaskStreamEvent) -> TaskStreamEvent:
+        """Logs an event and returns it stamped with its sequence number."""
+        sequence = self._next_sequence
+        self._next_sequence += 1
+        if not isinstance(event, JSONRPCError):
+            event = event.model_copy(
+                update={
+                    'metadata': {
+                        **(event.metadata or {}),
+                        SEQUENCE_METADATA_KEY: sequence,
+                    }
+                }
+            )
+        self._events.append((sequence, event))
+        return event
+
+    def replay(self, after: int | None = None) -> list[TaskStreamEvent]:
+        """Returns the retained events with a sequence number above `after`."""
+        return [
+            event
+            for sequence, event in self._events
+            if after is None or sequence > after
+        ]
+
+
+class OverflowPolicy(str, Enum):
+    """What to do when an SSE subscriber's queue is full."""
+
+    # Drop the oldest queued intermediate WORKING status update, which is
+    # superseded by newer ones; disconnect if there is none to drop.
+    COALESCE = 'coalesce'
+    DROP_OLDEST = 'drop_oldest'
+    DISCONNECT = 'disconnect'
+
+
+def _is_intermediate_status(event: TaskStreamEvent) -> bool:
+    return (
+        isinstance(event, TaskStatusUpdateEvent)
+        and not event.final
+        and event.status.state == TaskState.WORKING
+    )
+
+
+class SSESubscriber:
+    """A bounded queue of task events feeding one SSE client.
+
+    Publishing never blocks: when the queue is full the overflow policy
+    decides which events are dropped, or whether the subscriber is
+    disconnected. A disconnected client can catch up on the events it
+    missed with tasks/resubscribe.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 64,
+        overflow_policy: OverflowPolicy = OverflowPolicy.COALESCE,
+    ):
+        self.maxsize = maxsize
+        self.overflow_policy = overflow_policy
+        self.disconnected = False
+        self._events: deque[TaskStreamEvent] = deque()
+        self._ready = asyncio.Event()
+        self._enqueued = 0
+        self._delivered = 0
+        self._coalesced = 0
+        self._dropped = 0
+        self._max_lag = 0
+        self._last_delivered_sequence: int | None = None
+
+    def put_nowait(self, event: TaskStreamEvent):
+        if self.disconnected:
+            return
+        self._enqueued += 1
+        if len(self._events) >= self.maxsize and not self._make_room():
+            self.disconnect()
+            return
+        self._events.append(event)
+        self._max_lag = max(self._max_lag, len(self._events))
+        self._ready.set()
+
+    async def get(self) -> TaskStreamEvent | None:
+        """Returns the next event, or None once the subscriber is disconnected."""
+        while not self._events:
+            if self.disconnected:
+                return None
+            self._ready.clear()
+            await self._ready.wait()
+        event = self._events.popleft()
+        self._delivered += 1
+        sequence = get_event_sequence(event)
+        if sequence is not None:
+            self._last_delivered_sequence = sequence
+        return event
+
+    def disconnect(self):
+        self.disconnected = True
+        self._dropped += len(self._events)
+        self._events.clear()
+        self._ready.set()
+
+    def qsize(self) -> int:
+        return len(self._events)
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            'lag': len(self._events),
+            'max_lag': self._max_lag,
+            'enqueued': self._enqueued,
+            'delivered': self._delivered,
+            'coalesced': self._coalesced,
+            'dropped': self._dropped,
+            'disconnected': self.disconnected,
+            'last_delivered_sequence': self._last_delivered_sequence,
+        }
+
+    def _make_room(self) -> bool:
+        if self.overflow_policy == OverflowPolicy.DROP_OLDEST:
+            self._events.popleft()
+            self._dropped += 1
+            return True
+        if self.overflow_policy == OverflowPolicy.COALESCE:
+            for index, queued in enumerate(self._events):
+                if _is_intermediate_status(queued):
+                    del self._events[index]
+                    self._coalesced += 1
+                    return True
+        return False
@@ -2,9 +2,22 @@ import asyncio
 import logging
 
 from abc import ABC, abstractmethod
-from collections.abc import AsyncIterable
-
-from common.server.utils import new_not_implemented_error
+from collections.abc import AsyncIterable, Awaitable
+from typing import TYPE_CHECKING, Any, TypeVar
+
+from common.server.streaming import (
+    OverflowPolicy,
+    SSESubscriber,
+    TaskEventLog,
+    TaskStreamEvent,
+    get_event_sequence,
+    is_last_event,
+)
+from common.server.task_store import (
+    TERMINAL_TASK_STATES,
+    InMemoryTaskStore,
+    TaskStore,
+)
 from common.types import (
     Artifact,
     CancelTaskRequest,
@@ -24,11 +37,13 @@ from common.types import (
     SetTaskPushNotificationRequest,
     SetTaskPushNotificationResponse,
     Task,
+    TaskArtifactUpdateEvent,
     TaskIdParams,
     TaskNotCancelableError,
     TaskNotFoundError,
     TaskPushNotificationConfig,
     TaskQueryParams,
+    TaskResubscriptionParams,
     TaskResubscriptionRequest,
     TaskSendParams,
     TaskState,
@@ -37,8 +52,17 @@ from common.types import (
 )
 
 
+if TYPE_CHECKING:
+    # Only needed for annotations: the module requires PyJWT and jwcrypto.
+    from common.utils.push_notification_auth import (
+        PushNotificationDeliveryQueue,
+    )
+
+
 logger = logging.getLogger(__name__)
 
+T = TypeVar('T')
+
 
 class TaskManager(ABC):
     @abstractmethod
@@ -79,27 +103,100 @@ class TaskManager(ABC):
     ) -> AsyncIterable[SendTaskResponse] | JSONRPCResponse:
         pass
 
+    def get_metrics(self) -> dict[str, Any]:
+        return {}
+
 
 class InMemoryTaskManager(TaskManager):
-    def __init__(self):
-        self.tasks: dict[str, Task] = {}
+    def __init__(
+        self,
+        task_store: TaskStore | None = None,
+        lock_shards: int = 64,
+        event_log_size: int = 256,
+        sse_queue_size: int = 64,
+        sse_overflow_policy: OverflowPolicy = OverflowPolicy.COALESCE,
+        cancel_timeout: float = 10.0,
+        store_poll_interval: float = 0.5,
+        push_notifier: 'PushNotificationDeliveryQueue | None' = None,
+    ):
+        if task_store is None:
+            task_store = InMemoryTaskStore()
+        self.tasks = task_store
+        self.tasks.add_eviction_listener(self._on_task_evicted)
         self.push_notification_infos: dict[str, PushNotificationConfig] = {}
-        self.lock = asyncio.Lock()
-        self.task_sse_subscribers: dict[str, list[asyncio.Queue]] = {}
+        # Mutations are serialized per task rather than through one global
+        # lock: task ids are hashed onto a fixed table of lock shards so
+        # independent tasks almost never contend and the table stays bounded.
+        self.task_locks = [asyncio.Lock() for _ in range(lock_shards)]
+        self.task_sse_subscribers: dict[str, list[SSESubscriber]] = {}
         self.subscriber_lock = asyncio.Lock()
+        self.sse_queue_size = sse_queue_size
+        self.sse_overflow_policy = sse_overflow_policy
+        self.event_log_size = event_log_size
+        self.task_event_logs: dict[str, TaskEventLog] = {}
+        # The asyncio tasks doing the work of each running task, so that
+        # tasks/cancel can stop them.
+        self.running_tasks: dict[str, asyncio.Task] = {}
+        # The tasks whose work is being cancelled through tasks/cancel, as
+        # opposed to the request running it being cancelled.
+        self._cancel_requested: set[str] = set()
+        self.cancel_timeout = cancel_timeout
+        # How often to poll a shared store for updates of a task running in
+        # another server process.
+        self.store_poll_interval = store_poll_interval
+        # Delivers a notification to the configured URL of a task whenever
+        # its state changes, if set.
+        self.push_notifier = push_notifier
+
+    def task_lock(self, task_id: str) -> asyncio.Lock:
+        """Returns the lock shard guarding mutations of the given task."""
+        return self.task_locks[hash(task_id) % len(self.task_locks)]
+
+    def _on_task_evicted(self, task_id: str):
+        self.push_notification_infos.pop(task_id, None)
+        self.task_sse_subscribers.pop(task_id, None)
+        self.task_event_logs.pop(task_id, None)
+
+    def get_metrics(self) -> dict[str, Any]:
+        metrics = {
+            'task_store': self.tasks.metrics(),
+            'push_notification_infos': len(self.push_notification_infos),
+            'sse_subscribers': {
+                task_id: [subscriber.metrics() for subscriber in subscribers]
+                for task_id, subscribers in self.task_sse_subscribers.items()
+                if subscribers
+            },
+            'event_logs': len(self.task_event_logs),
+            'running_tasks': len(self.running_tasks),
+        }
+        if self.push_notifier is not None:
+            metrics['push_notifications'] = self.push_notifier.metrics()
+        return metrics
+
+    def notify_state_transition(self, task: Task, previous_state: TaskState):
+        """Queues a push notification if the state of the task changed."""
+        if self.push_notifier is None or task.status.state == previous_state:
+            return
+        config = self.push_notification_infos.get(task.id)
+        if config is None:
+            return
+        self.push_notifier.enqueue(
+            config.url, task.model_dump(mode='json', exclude_none=True)
+        )
 
     async def on_get_task(self, request: GetTaskRequest) -> GetTaskResponse:
         logger.info(f'Getting task {request.params.id}')
         task_query_params: TaskQueryParams = request.params
 
-        async with self.lock:
-            task = self.tasks.get(task_query_params.id)
-            if task is None:
-                return GetTaskResponse(id=request.id, error=TaskNotFoundError())
+        # Reads take no lock: the snapshot below is built synchronously, so
+        # no writer can interleave with it on the event loop.
+        task = self.tasks.get(task_query_params.id)
+        if task is None:
+            return GetTaskResponse(id=request.id, error=TaskNotFoundError())
 
-            task_result = self.append_task_history(
-                task, task_query_params.historyLength
-            )
+        task_result = self.append_task_history(
+            task, task_query_params.historyLength
+        )
 
         return GetTaskResponse(id=request.id, result=task_result)
 
@@ -109,14 +206,60 @@ class InMemoryTaskManager(TaskManager):
         logger.info(f'Cancelling task {request.params.id}')
         task_id_params: TaskIdParams = request.params
 
-        async with self.lock:
-            task = self.tasks.get(task_id_params.id)
-            if task is None:
-                return CancelTaskResponse(
-                    id=request.id, error=TaskNotFoundError()
+        task = self.tasks.get(task_id_params.id)
+        if task is None:
+            return CancelTaskResponse(id=request.id, error=TaskNotFoundError())
+
+        running_task = self.running_tasks.get(task_id_params.id)
+        if (
+            task.status.state in TERMINAL_TASK_STATES
+            or running_task is None
+            or running_task.done()
+        ):
+            return CancelTaskResponse(
+                id=request.id, error=TaskNotCancelableError()
+            )
+
+        # Cancelling the asyncio task raises CancelledError inside the agent
+        # code it is awaiting, which stops the runner and releases its
+        # resources. Wait for that to finish before reporting the task.
+        self._cancel_requested.add(task_id_params.id)
+        running_task.cancel()
+        await asyncio.wait({running_task}, timeout=self.cancel_timeout)
+        if not running_task.done():
+            # The task is reported in its current state, and only marked
+            # canceled once its work has actually stopped.
+            logger.warning(
+                f'Task {task_id_params.id} did not stop within '
+                f'{self.cancel_timeout}s, cancellation is pending'
+            )
+            running_task.add_done_callback(
+                lambda _: asyncio.ensure_future(
+                    self._mark_canceled(task_id_params.id)
                 )
+            )
+            return CancelTaskResponse(
+                id=request.id, result=self.append_task_history(task, None)
+            )
+
+        task = await self._mark_canceled(task_id_params.id)
+        return CancelTaskResponse(
+            id=request.id, result=self.append_task_history(task, None)
+        )
 
-        return CancelTaskResponse(id=request.id, error=TaskNotCancelableError())
+    async def _mark_canceled(self, task_id: str) -> Task | None:
+        self._cancel_requested.discard(task_id)
+        task = self.tasks.get(task_id)
+        if task is None or task.status.state in TERMINAL_TASK_STATES:
+            # The work finished on its own before it could be stopped.
+            return task
+        status = TaskStatus(state=TaskState.CANCELED)
+        task = await self.update_store(task_id, status, None)
+        await self.enqueue_events_for_sse(
+            task_id,
+            TaskStatusUpdateEvent(id=task_id, status=status, final=True),
+        )
+        return task
 
     @abstractmethod
     async def on_send_task(self, request: SendTaskRequest) -> SendTaskResponse:
@@ -131,7 +274,7 @@ class InMemoryTaskManager(TaskManager):
     async def set_push_notification_info(
         self, task_id: str, notification_config: PushNotificationConfig
     ):
-        async with self.lock:
+        async with self.task_lock(task_id):
             task = self.tasks.get(task_id)
             if task is None:
                 raise ValueError(f'Task not found for {task_id}')
@@ -141,18 +284,14 @@ class InMemoryTaskManager(TaskManager):
     async def get_push_notification_info(
         self, task_id: str
     ) -> PushNotificationConfig:
-        async with self.lock:
-            task = self.tasks.get(task_id)
-            if task is None:
-                raise ValueError(f'Task not found for {task_id}')
-
-            return self.push_notification_infos[task_id]
+        task = self.tasks.get(task_id)
+        if task is None:
+            raise ValueError(f'Task not found for {task_id}')
 
-    
+        return self.push_notification_infos[task_id]
 
     async def has_push_notification_info(self, task_id: str) -> bool:
-        async with self.lock:
-            return task_id in self.push_notification_infos
+        return task_id in self.push_notification_infos
 
     async def on_set_task_push_notification(
         self, request: SetTaskPushNotificationRequest
@@ -206,7 +345,7 @@ class InMemoryTaskManager(TaskManager):
 
     async def upsert_task(self, task_send_params: TaskSendParams) -> Task:
         logger.info(f'Upserting task {task_send_params.id}')
-        async with self.lock:
+        async with self.task_lock(task_send_params.id):
             task = self.tasks.get(task_send_params.id)
             if task is None:
                 task = Task(
@@ -216,27 +355,144 @@ class InMemoryTaskManager(TaskManager):
                     status=TaskStatus(state=TaskState.SUBMITTED),
                     history=[task_send_params.message],
                 )
-                self.tasks[task_send_params.id] = task
             else:
                 task.history.append(task_send_params.message)
 
-            return task
+            self.tasks.put(task)
+
+        if task_send_params.pushNotification is not None:
+            # Set before any work is done, so that no transition is missed.
+            await self.set_push_notification_info(
+                task_send_params.id, task_send_params.pushNotification
+            )
+        return task
 
     async def on_resubscribe_to_task(
         self, request: TaskResubscriptionRequest
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
-        return new_not_implemented_error(request.id)
+        logger.info(f'Resubscribing to task {request.params.id}')
+        params: TaskResubscriptionParams = request.params
+
+        event_log = self.task_event_logs.get(params.id)
+        if event_log is None:
+            task = self.tasks.get(params.id)
+            if task is None:
+                return JSONRPCResponse(id=request.id, error=TaskNotFoundError())
+            if (
+                self.tasks.shared
+                and task.status.state not in TERMINAL_TASK_STATES
+            ):
+                # The task may be streaming from another server process.
+                return self._follow_stored_task(request.id, task)
+            # Nothing was streamed for this task, report its current status.
+            event_log = TaskEventLog(max_events=1)
+            event_log.append(
+                TaskStatusUpdateEvent(id=task.id, status=task.status, final=True)
+            )
+            return self.dequeue_events_for_sse(
+                request.id, params.id, None, event_log.replay()
+            )
+
+        # Subscribe before taking the replay snapshot so no event published
+        # in between is lost; duplicates are skipped by sequence number.
+        sse_event_queue = None
+        if not event_log.closed:
+            sse_event_queue = await self.setup_sse_consumer(params.id)
+        replay = event_log.replay(after=params.lastSequence)
+        return self.dequeue_events_for_sse(
+            request.id, params.id, sse_event_queue, replay
+        )
+
+    async def start_streaming_task(
+        self,
+        request: SendTaskStreamingRequest,
+        responses: AsyncIterable[SendTaskStreamingResponse | JSONRPCResponse],
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        """Runs a streaming task in the background and subscribes to it.
+
+        The responses are published to the task's event log rather than
+        written to the client directly, so the task keeps running if the
+        client disconnects and can be resumed with tasks/resubscribe.
+        """
+        task_id = request.params.id
+        sse_event_queue = await self.setup_sse_consumer(task_id)
+        running_task = asyncio.create_task(
+            self._publish_responses(task_id, responses)
+        )
+        self._track_running_task(task_id, running_task)
+        return self.dequeue_events_for_sse(request.id, task_id, sse_event_queue)
+
+    async def run_cancelable(self, task_id: str, work: Awaitable[T]) -> T | None:
+        """Runs the work of a non-streaming task so tasks/cancel can stop it.
+
+        Returns None if the task was canceled through tasks/cancel, by which
+        time it is stored as canceled.
+        """
+        running_task = asyncio.ensure_future(work)
+        self._track_running_task(task_id, running_task)
+        try:
+            return await running_task
+        except asyncio.CancelledError:
+            if task_id not in self._cancel_requested:
+                # It is the caller itself that is being cancelled.
+                raise
+            # This may resume before tasks/cancel does, so the task is marked
+            # canceled here too rather than reported in its previous state.
+            await self._mark_canceled(task_id)
+            return None
+
+    def _track_running_task(self, task_id: str, running_task: asyncio.Task):
+        self.running_tasks[task_id] = running_task
+        running_task.add_done_callback(
+            lambda t: self._on_running_task_done(task_id, t)
+        )
+
+    async def _publish_responses(
+        self,
+        task_id: str,
+        responses: AsyncIterable[SendTaskStreamingResponse | JSONRPCResponse],
+    ):
+        try:
+            async for response in responses:
+                if response.error is not None:
+                    await self.enqueue_events_for_sse(task_id, response.error)
+                elif response.result is not None:
+                    await self.enqueue_events_for_sse(task_id, response.result)
+        except Exception as e:
+            logger.error(f'Error while streaming task {task_id}: {e}')
+            await self.enqueue_events_for_sse(
+                task_id,
+                InternalError(message=f'Error while streaming task: {e}'),
+            )
+            return
+
+        event_log = self.task_event_logs.get(task_id)
+        if event_log is not None and not event_log.closed:
+            # Never leave subscribers waiting on a stream that has ended.
+            task = self.tasks.get(task_id)
+            if task is not None:
+                await self.enqueue_events_for_sse(
+                    task_id,
+                    TaskStatusUpdateEvent(
+                        id=task_id, status=task.status, final=True
+                    ),
+                )
+
+    def _on_running_task_done(self, task_id: str, running_task: asyncio.Task):
+        if self.running_tasks.get(task_id) is running_task:
+            del self.running_tasks[task_id]
 
     async def update_store(
         self, task_id: str, status: TaskStatus, artifacts: list[Artifact]
     ) -> Task:
-        async with self.lock:
+        async with self.task_lock(task_id):
             try:
                 task = self.tasks[task_id]
             except KeyError:
                 logger.error(f'Task {task_id} not found for updating the task')
                 raise ValueError(f'Task {task_id} not found')
 
+            previous_state = task.status.state
             task.status = status
 
             if status.message is not None:
@@ -247,6 +503,8 @@ class InMemoryTaskManager(TaskManager):
                     task.artifacts = []
                 task.artifacts.extend(artifacts)
 
+            self.tasks.put(task)
+            self.notify_state_transition(task, previous_state)
             return task
 
     def append_task_history(self, task: Task, historyLength: int | None):
@@ -255,6 +513,8 @@ class InMemoryTaskManager(TaskManager):
             new_task.history = new_task.history[-historyLength:]
         else:
             new_task.history = []
+        if new_task.artifacts is not None:
+            new_task.artifacts = list(new_task.artifacts)
 
         return new_task
 
@@ -267,33 +527,110 @@ class InMemoryTaskManager(TaskManager):
                     raise ValueError('Task not found for resubscription')
                 self.task_sse_subscribers[task_id] = []
 
-            sse_event_queue = asyncio.Queue(maxsize=0)  # <=0 is unlimited
+            sse_event_queue = SSESubscriber(
+                maxsize=self.sse_queue_size,
+                overflow_policy=self.sse_overflow_policy,
+            )
             self.task_sse_subscribers[task_id].append(sse_event_queue)
             return sse_event_queue
 
     async def enqueue_events_for_sse(self, task_id, task_update_event):
+        event_log = self.task_event_logs.get(task_id)
+        if event_log is None:
+            event_log = TaskEventLog(max_events=self.event_log_size)
+            self.task_event_logs[task_id] = event_log
+        task_update_event = event_log.append(task_update_event)
+
         async with self.subscriber_lock:
-            if task_id not in self.task_sse_subscribers:
-                return
+            current_subscribers = list(
+                self.task_sse_subscribers.get(task_id, ())
+            )
 
-            current_subscribers = self.task_sse_subscribers[task_id]
-            for subscriber in current_subscribers:
-                await subscriber.put(task_update_event)
+        # Fan out outside the lock; putting never blocks on a slow consumer.
+        for subscriber in current_subscribers:
+            subscriber.put_nowait(task_update_event)
 
     async def dequeue_events_for_sse(
-        self, request_id, task_id, sse_event_queue: asyncio.Queue
+        self,
+        request_id,
+        task_id,
+        sse_event_queue: SSESubscriber | None,
+        replay: list[TaskStreamEvent] | None = None,
     ) -> AsyncIterable[SendTaskStreamingResponse] | JSONRPCResponse:
+        last_sequence = -1
         try:
-            while True:
+            for event in replay or []:
+                yield self._to_streaming_response(request_id, event)
+                sequence = get_event_sequence(event)
+                if sequence is not None:
+                    last_sequence = sequence
+                if is_last_event(event):
+                    return
+
+            while sse_event_queue is not None:
                 event = await sse_event_queue.get()
-                if isinstance(event, JSONRPCError):
-                    yield SendTaskStreamingResponse(id=request_id, error=event)
+                if event is None:
+                    logger.warning(
+                        f'SSE subscriber for task {task_id} fell behind and'
+                        ' was disconnected'
+                    )
                     break
+                sequence = get_event_sequence(event)
+                if sequence is not None and sequence <= last_sequence:
+                    continue
 
-                yield SendTaskStreamingResponse(id=request_id, result=event)
-                if isinstance(event, TaskStatusUpdateEvent) and event.final:
+                yield self._to_streaming_response(request_id, event)
+                if is_last_event(event):
                     break
         finally:
-            async with self.subscriber_lock:
-                if task_id in self.task_sse_subscribers:
-                    self.task_sse_subscribers[task_id].remove(sse_event_queue)
+            if sse_event_queue is not None:
+                async with self.subscriber_lock:
+                    subscribers = self.task_sse_subscribers.get(task_id)
+                    if subscribers and sse_event_queue in subscribers:
+                        subscribers.remove(sse_event_queue)
+
+    async def _follow_stored_task(
+        self, request_id, task: Task
+    ) -> AsyncIterable[SendTaskStreamingResponse]:
+        """Streams the updates of a task by polling the shared task store.
+
+        The event log of the task lives in the process running it, so only
+        status changes and new artifacts are reported, without replay.
+        """
+        status = task.status
+        artifacts_seen = 0
+        yield self._to_streaming_response(
+            request_id, TaskStatusUpdateEvent(id=task.id, status=status)
+        )
+        while True:
+            await asyncio.sleep(self.store_poll_interval)
+            task = self.tasks.get(task.id)
+            if task is None:
+                yield self._to_streaming_response(
+                    request_id, TaskNotFoundError()
+                )
+                return
+            for artifact in (task.artifacts or [])[artifacts_seen:]:
+                yield self._to_streaming_response(
+                    request_id,
+                    TaskArtifactUpdateEvent(id=task.id, artifact=artifact),
+                )
+            artifacts_seen = len(task.artifacts or [])
+            final = task.status.state in TERMINAL_TASK_STATES
+            if task.status != status or final:
+                status = task.status
+                yield self._to_streaming_response(
+                    request_id,
+                    TaskStatusUpdateEvent(
+                        id=task.id, status=status, final=final
+                    ),
+                )
+            if final:
+                return
+
+    def _to_streaming_response(
+        self, request_id, event: TaskStreamEvent
+    ) -> SendTaskStreamingResponse:
+        if isinstance(event, JSONRPCError):
+            return SendTaskStreamingResponse(id=request_id, error=event)
+        return SendTaskStreamingResponse(id=request_id, result=event)
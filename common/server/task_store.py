@@ -0,0 +1,579 @@
+import asyncio
+import logging
+import os
+import sqlite3
+import time
+import uuid
+import weakref
+import zlib
+
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+from pydantic import TypeAdapter
+
+from common.types import Artifact, Message, Task, TaskState, TaskStatus
+
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_TASK_STATES = frozenset(
+    {TaskState.COMPLETED, TaskState.FAILED, TaskState.CANCELED}
+)
+
+TaskEvictionListener = Callable[[str], None]
+
+
+class TaskStore(ABC):
+    """Storage backend for the tasks of an InMemoryTaskManager.
+
+    Task objects returned by `get` may be mutated in place by the caller,
+    which must then hand them back to `put` for the change to be persisted.
+    A `shared` store is visible to several server processes, which may then
+    update the tasks it holds.
+    """
+
+    shared = False
+
+    def __init__(self):
+        self._eviction_listeners: list[TaskEvictionListener] = []
+
+    def add_eviction_listener(self, listener: TaskEvictionListener):
+        """Registers a callback invoked with the id of every evicted task."""
+        self._eviction_listeners.append(listener)
+
+    @abstractmethod
+    def get(self, task_id: str) -> Task | None:
+        pass
+
+    @abstractmethod
+    def put(self, task: Task):
+        pass
+
+    @abstractmethod
+    def delete(self, task_id: str) -> Task | None:
+        pass
+
+    @abstractmethod
+    def metrics(self) -> dict[str, Any]:
+        pass
+
+    def close(self):
+        pass
+
+    def __getitem__(self, task_id: str) -> Task:
+        task = self.get(task_id)
+        if task is None:
+            raise KeyError(task_id)
+        return task
+
+    def __contains__(self, task_id: str) -> bool:
+        return self.get(task_id) is not None
+
+    def _notify_evicted(self, task_id: str):
+        for listener in self._eviction_listeners:
+            try:
+                listener(task_id)
+            except Exception as e:
+                logger.error(f'Error in task eviction listener: {e}')
+
+
+class InMemoryTaskStore(TaskStore):
+    """A bounded task store with LRU eviction and TTL for finished tasks.
+
+    Tasks in a terminal state (completed, failed or canceled) expire once
+    they have not been accessed for `terminal_ttl` seconds. When the store
+    holds more than `max_entries` tasks, the least recently used finished
+    tasks are evicted first; active tasks are only evicted as a last resort.
+    """
+
+    def __init__(
+        self,
+        max_entries: int | None = 10_000,
+        terminal_ttl: float | None = 3600.0,
+    ):
+        super().__init__()
+        self.max_entries = max_entries
+        self.terminal_ttl = terminal_ttl
+        # All tasks, in least-recently-used order.
+        self._tasks: OrderedDict[str, Task] = OrderedDict()
+        # Terminal tasks mapped to their last access time, in LRU order. As
+        # the TTL is measured from the last access, this is also expiry order.
+        self._terminal: OrderedDict[str, float] = OrderedDict()
+        # Serialized sizes, computed lazily when metrics are requested.
+        self._sizes: dict[str, int] = {}
+        self._evicted_lru = 0
+        self._evicted_ttl = 0
+
+    def get(self, task_id: str) -> Task | None:
+        self._expire()
+        task = self._tasks.get(task_id)
+        if task is not None:
+            self._touch(task_id)
+        return task
+
+    def put(self, task: Task):
+        """Inserts or refreshes a task after it has been created or updated."""
+        self._expire()
+        self._tasks[task.id] = task
+        self._sizes.pop(task.id, None)
+        if task.status.state in TERMINAL_TASK_STATES:
+            self._terminal[task.id] = time.monotonic()
+        else:
+            self._terminal.pop(task.id, None)
+        self._touch(task.id)
+        self._enforce_max_entries()
+
+    def delete(self, task_id: str) -> Task | None:
+        task = self._tasks.pop(task_id, None)
+        self._terminal.pop(task_id, None)
+        self._sizes.pop(task_id, None)
+        return task
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    def metrics(self) -> dict[str, Any]:
+        self._expire()
+        for task_id, task in self._tasks.items():
+            if task_id not in self._sizes:
+                self._sizes[task_id] = len(
+                    task.model_dump_json(exclude_none=True)
+                )
+        return {
+            'entries': len(self._tasks),
+            'active_entries': len(self._tasks) - len(self._terminal),
+            'terminal_entries': len(self._terminal),
+            'max_entries': self.max_entries,
+            'terminal_ttl_seconds': self.terminal_ttl,
+            'evicted_lru': self._evicted_lru,
+            'evicted_ttl': self._evicted_ttl,
+            'approx_bytes': sum(self._sizes.values()),
+        }
+
+    def _touch(self, task_id: str):
+        self._tasks.move_to_end(task_id)
+        if task_id in self._terminal:
+            self._terminal[task_id] = time.monotonic()
+            self._terminal.move_to_end(task_id)
+
+    def _expire(self):
+        if self.terminal_ttl is None or not self._terminal:
+            return
+        deadline = time.monotonic() - self.terminal_ttl
+        while self._terminal:
+            task_id, last_access = next(iter(self._terminal.items()))
+            if last_access > deadline:
+                break
+            self._evict(task_id)
+            self._evicted_ttl += 1
+
+    def _enforce_max_entries(self):
+        if self.max_entries is None:
+            return
+        while len(self._tasks) > self.max_entries:
+            if self._terminal:
+                task_id = next(iter(self._terminal))
+            else:
+                task_id = next(iter(self._tasks))
+                logger.warning(
+                    f'Task store is full of active tasks, evicting {task_id}'
+                )
+            self._evict(task_id)
+            self._evicted_lru += 1
+
+    def _evict(self, task_id: str):
+        self.delete(task_id)
+        self._notify_evicted(task_id)
+
+
+_SQLITE_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tasks (
+    id TEXT PRIMARY KEY,
+    session_id TEXT,
+    version TEXT NOT NULL,
+    state TEXT NOT NULL,
+    status BLOB NOT NULL,
+    history BLOB,
+    artifacts BLOB,
+    metadata BLOB,
+    terminal_at REAL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tasks_terminal_at ON tasks (terminal_at)
+    WHERE terminal_at IS NOT NULL;
+"""
+_SQLITE_UPSERT_TASK = (
+    'INSERT OR REPLACE INTO tasks (id, session_id, version, state, status,'
+    ' history, artifacts, metadata, terminal_at)'
+    ' VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)'
+)
+_SQLITE_SELECT_VERSION = 'SELECT version FROM tasks WHERE id = ?'
+_SQLITE_SELECT_TASK = (
+    'SELECT version, session_id, status, history, artifacts, metadata'
+    ' FROM tasks WHERE id = ?'
+)
+_SQLITE_DELETE_TASK = 'DELETE FROM tasks WHERE id = ?'
+_SQLITE_SELECT_EXPIRED = 'SELECT id FROM tasks WHERE terminal_at < ?'
+_SQLITE_DELETE_EXPIRED = 'DELETE FROM tasks WHERE terminal_at < ?'
+
+# Blobs at least this large are stored zlib-compressed.
+_COMPRESS_THRESHOLD = 1024
+
+_STATUS_ADAPTER = TypeAdapter(TaskStatus)
+_HISTORY_ADAPTER = TypeAdapter(list[Message])
+_ARTIFACTS_ADAPTER = TypeAdapter(list[Artifact])
+_METADATA_ADAPTER = TypeAdapter(dict[str, Any])
+
+
+def _pack(adapter: TypeAdapter, value: Any) -> bytes | None:
+    if value is None:
+        return None
+    data = adapter.dump_json(value, exclude_none=True)
+    if len(data) >= _COMPRESS_THRESHOLD:
+        return b'z' + zlib.compress(data, 1)
+    return b'j' + data
+
+
+def _unpack(adapter: TypeAdapter, blob: bytes | None) -> Any:
+    if blob is None:
+        return None
+    data = blob[1:]
+    if blob[:1] == b'z':
+        data = zlib.decompress(data)
+    return adapter.validate_json(data)
+
+
+class SQLiteTaskStore(TaskStore):
+    """A task store persisted to SQLite, shareable between processes.
+
+    The database runs in WAL mode so several server processes can read it
+    while another one writes. `put` only marks the task as dirty: updates
+    are coalesced per task and committed in batches by a background writer
+    thread every `flush_interval` seconds. A failed batch is retried with
+    exponential backoff, up to `max_flush_backoff` seconds apart. Reads
+    are served from a local cache as long as the row version in the
+    database has not changed, which takes a query on every read; with
+    `exclusive`, the process is taken to be the only writer of the
+    database and its cache is trusted as is. Tasks in a terminal state are
+    deleted `terminal_ttl` seconds after their last update.
+
+    The store can be created before forking server worker processes: each
+    child reopens its own connections and writer thread. A store that is
+    forked is no longer exclusive, neither in the parent nor in the children.
+    """
+
+    shared = True
+
+    def __init__(
+        self,
+        path: str,
+        terminal_ttl: float | None = 3600.0,
+        flush_interval: float = 0.05,
+        cache_size: int = 1024,
+        exclusive: bool = False,
+        max_flush_backoff: float = 5.0,
+    ):
+        super().__init__()
+        self.path = path
+        self.terminal_ttl = terminal_ttl
+        self.flush_interval = flush_interval
+        self.cache_size = cache_size
+        self.exclusive = exclusive
+        self.max_flush_backoff = max_flush_backoff
+        self._reader = self._connect()
+        self._reader.executescript(_SQLITE_SCHEMA)
+        self._writer = self._connect()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='sqlite-task-store'
+        )
+        # Clean tasks with the row version they were read or written with.
+        self._cache: OrderedDict[str, tuple[Task, str]] = OrderedDict()
+        # Tasks that are dirty or whose write has not been committed yet.
+        self._pending: dict[str, Task] = {}
+        self._dirty: set[str] = set()
+        self._inflight_writes: dict[str, int] = {}
+        self._flush_handle: asyncio.TimerHandle | None = None
+        self._flush_failures = 0
+        self._last_expiry = 0.0
+        self._batches_written = 0
+        self._rows_written = 0
+        self._evicted_ttl = 0
+        self._inherited_connections: list[sqlite3.Connection] = []
+
+        store = weakref.ref(self)
+
+        def reopen_in_child():
+            if store() is not None:
+                store()._reopen_after_fork()
+
+        def share_in_parent():
+            if store() is not None:
+                store().exclusive = False
+
+        os.register_at_fork(
+            after_in_child=reopen_in_child, after_in_parent=share_in_parent
+        )
+
+    def _reopen_after_fork(self):
+        # SQLite connections must not be used across a fork, nor closed in
+        # the child, and the writer thread does not survive it. Updates that
+        # were pending at the fork are left for the parent to write.
+        self._inherited_connections += [self._reader, self._writer]
+        self._reader = self._connect()
+        self._writer = self._connect()
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix='sqlite-task-store'
+        )
+        self._cache.clear()
+        self._pending.clear()
+        self._dirty.clear()
+        self._inflight_writes.clear()
+        self._flush_handle = None
+        self._flush_failures = 0
+        self.exclusive = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.path,
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+        )
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def get(self, task_id: str) -> Task | None:
+        task = self._pending.get(task_id)
+        if task is not None:
+            return task
+
+        cached = self._cache.get(task_id)
+        if cached is not None and self.exclusive:
+            self._cache.move_to_end(task_id)
+            return cached[0]
+        if cached is not None:
+            row = self._reader.execute(
+                _SQLITE_SELECT_VERSION, (task_id,)
+            ).fetchone()
+            if row is None:
+                del self._cache[task_id]
+                return None
+            if row[0] == cached[1]:
+                self._cache.move_to_end(task_id)
+                return cached[0]
+
+        row = self._reader.execute(_SQLITE_SELECT_TASK, (task_id,)).fetchone()
+        if row is None:
+            return None
+        version, session_id, status, history, artifacts, metadata = row
+        task = Task(
+            id=task_id,
+            sessionId=session_id,
+            status=_unpack(_STATUS_ADAPTER, status),
+            history=_unpack(_HISTORY_ADAPTER, history),
+            artifacts=_unpack(_ARTIFACTS_ADAPTER, artifacts),
+            metadata=_unpack(_METADATA_ADAPTER, metadata),
+        )
+        self._remember(task, version)
+        return task
+
+    def put(self, task: Task):
+        self._cache.pop(task.id, None)
+        self._pending[task.id] = task
+        self._dirty.add(task.id)
+        if self._flush_handle is not None:
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush()
+            return
+        self._schedule_flush(loop, self.flush_interval)
+
+    def delete(self, task_id: str) -> Task | None:
+        task = self._pending.pop(task_id, None)
+        self._dirty.discard(task_id)
+        cached = self._cache.pop(task_id, None)
+        if task is None and cached is not None:
+            task = cached[0]
+        self._executor.submit(self._execute_write, _SQLITE_DELETE_TASK, task_id)
+        return task
+
+    def flush(self):
+        """Commits all pending updates, blocking until they are written."""
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        batch = self._start_flush()
+        if batch is not None:
+            future, versions = batch
+            error = future.exception()
+            self._on_flushed(versions, future)
+            if error is not None:
+                raise error
+
+    def close(self):
+        self.flush()
+        self._executor.shutdown(wait=True)
+        self._writer.close()
+        self._reader.close()
+
+    def metrics(self) -> dict[str, Any]:
+        entries, terminal_entries = self._reader.execute(
+            'SELECT COUNT(*), COUNT(terminal_at) FROM tasks'
+        ).fetchone()
+        page_count = self._reader.execute('PRAGMA page_count').fetchone()[0]
+        page_size = self._reader.execute('PRAGMA page_size').fetchone()[0]
+        return {
+            'entries': entries,
+            'active_entries': entries - terminal_entries,
+            'terminal_entries': terminal_entries,
+            'terminal_ttl_seconds': self.terminal_ttl,
+            'evicted_ttl': self._evicted_ttl,
+            'cached_entries': len(self._cache),
+            'dirty_entries': len(self._dirty),
+            'inflight_writes': sum(self._inflight_writes.values()),
+            'batches_written': self._batches_written,
+            'rows_written': self._rows_written,
+            'db_bytes': page_count * page_size,
+        }
+
+    def _remember(self, task: Task, version: str):
+        self._cache[task.id] = (task, version)
+        self._cache.move_to_end(task.id)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def _schedule_flush(self, loop: asyncio.AbstractEventLoop, delay: float):
+        self._flush_handle = loop.call_later(
+            delay, self._flush_in_background, loop
+        )
+
+    def _flush_in_background(self, loop: asyncio.AbstractEventLoop):
+        self._flush_handle = None
+        batch = self._start_flush()
+        if batch is None:
+            return
+        future, versions = batch
+        future.add_done_callback(
+            lambda f: loop.call_soon_threadsafe(self._on_flushed, versions, f)
+        )
+
+    def _start_flush(self):
+        """Serializes the dirty tasks and hands them to the writer thread."""
+        expire_before = None
+        now = time.time()
+        if self.terminal_ttl is not None and (
+            now - self._last_expiry >= min(self.terminal_ttl, 60.0)
+        ):
+            expire_before = now - self.terminal_ttl
+            self._last_expiry = now
+        if not self._dirty and expire_before is None:
+            return None
+
+        rows = []
+        versions = {}
+        for task_id in self._dirty:
+            task = self._pending[task_id]
+            version = uuid.uuid4().hex
+            terminal_at = (
+                now if task.status.state in TERMINAL_TASK_STATES else None
+            )
+            rows.append(
+                (
+                    task_id,
+                    task.sessionId,
+                    version,
+                    task.status.state.value,
+                    _pack(_STATUS_ADAPTER, task.status),
+                    _pack(_HISTORY_ADAPTER, task.history),
+                    _pack(_ARTIFACTS_ADAPTER, task.artifacts),
+                    _pack(_METADATA_ADAPTER, task.metadata),
+                    terminal_at,
+                )
+            )
+            versions[task_id] = version
+            self._inflight_writes[task_id] = (
+                self._inflight_writes.get(task_id, 0) + 1
+            )
+        self._dirty.clear()
+        future = self._executor.submit(self._write_batch, rows, expire_before)
+        return future, versions
+
+    def _write_batch(
+        self, rows: list[tuple], expire_before: float | None
+    ) -> list[str]:
+        conn = self._writer
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if rows:
+                conn.executemany(_SQLITE_UPSERT_TASK, rows)
+            expired = []
+            if expire_before is not None:
+                expired = [
+                    row[0]
+                    for row in conn.execute(
+                        _SQLITE_SELECT_EXPIRED, (expire_before,)
+                    )
+                ]
+                if expired:
+                    conn.execute(_SQLITE_DELETE_EXPIRED, (expire_before,))
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        self._batches_written += 1
+        self._rows_written += len(rows)
+        return expired
+
+    def _execute_write(self, sql: str, *params: Any):
+        self._writer.execute(sql, params)
+
+    def _on_flushed(self, versions: dict[str, str], future):
+        error = future.exception()
+        if error is not None:
+            self._flush_failures += 1
+            logger.error(f'Error while writing tasks to {self.path}: {error}')
+        else:
+            self._flush_failures = 0
+        for task_id, version in versions.items():
+            remaining = self._inflight_writes.get(task_id, 1) - 1
+            if remaining > 0:
+                self._inflight_writes[task_id] = remaining
+                continue
+            self._inflight_writes.pop(task_id, None)
+            if error is not None and task_id in self._pending:
+                # Keep the task in memory and retry it with the next batch.
+                self._dirty.add(task_id)
+                continue
+            if task_id in self._dirty:
+                continue
+            task = self._pending.pop(task_id, None)
+            if task is not None:
+                self._remember(task, version)
+        if error is None:
+            for task_id in future.result():
+                if task_id in self._pending:
+                    continue
+                self._cache.pop(task_id, None)
+                self._evicted_ttl += 1
+                self._notify_evicted(task_id)
+        elif self._dirty:
+            # Retried without waiting for the next put, which may never
+            # come, and no sooner than the backoff allows, even if a put
+            # scheduled a flush meanwhile.
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            if self._flush_handle is not None:
+                self._flush_handle.cancel()
+            delay = min(
+                self.max_flush_backoff,
+                self.flush_interval * 2**self._flush_failures,
+            )
+            self._schedule_flush(loop, delay)
@@ -1,3 +1,5 @@
+import socket
+
 from common.types import (
     ContentTypeNotSupportedError,
     JSONRPCResponse,
@@ -26,3 +28,25 @@ def new_incompatible_types_error(request_id):
 
 def new_not_implemented_error(request_id):
     return JSONRPCResponse(id=request_id, error=UnsupportedOperationError())
+
+
+def create_listening_socket(
+    host: str, port: int, backlog: int = 2048
+) -> socket.socket:
+    """Binds a TCP socket to serve from, e.g. from several processes.
+
+    The socket is created with an explicit TCP protocol: asyncio only
+    disables Nagle's algorithm on accepted sockets that say so, and
+    without that every response on a kept-alive connection stalls until
+    the client's delayed ACK, about 40 ms later.
+    """
+    family = socket.AF_INET6 if ':' in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    try:
+        sock.bind((host, port))
+        sock.listen(backlog)
+    except OSError:
+        sock.close()
+        raise
+    return sock
@@ -133,6 +133,10 @@ class TaskQueryParams(TaskIdParams):
     historyLength: int | None = None
 
 
+class TaskResubscriptionParams(TaskIdParams):
+    lastSequence: int | None = None
+
+
 class TaskSendParams(BaseModel):
     id: str
     sessionId: str = Field(default_factory=lambda: uuid4().hex)
@@ -232,7 +236,7 @@ class GetTaskPushNotificationResponse(JSONRPCResponse):
 
 class TaskResubscriptionRequest(JSONRPCRequest):
     method: Literal['tasks/resubscribe',] = 'tasks/resubscribe'
-    params: TaskIdParams
+    params: TaskResubscriptionParams
 
 
 A2ARequest = TypeAdapter(
@@ -311,6 +315,12 @@ class ContentTypeNotSupportedError(JSONRPCError):
     data: None = None
 
 
+class ServerBusyError(JSONRPCError):
+    code: int = -32006
+    message: str = 'Server is busy, retry later'
+    data: Any | None = None
+
+
 class AgentProvider(BaseModel):
     organization: str
     url: str | None = None
@@ -320,6 +330,9 @@ class AgentCapabilities(BaseModel):
     streaming: bool = False
     pushNotifications: bool = False
     stateTransitionHistory: bool = False
+    # Admission limits of the server, if any.
+    maxConcurrentTasks: int | None = None
+    maxQueuedTasks: int | None = None
 
 
 class AgentAuthentication(BaseModel):
@@ -0,0 +1,248 @@
+"""Shared Google Calendar API client for the calendar tools."""
+
+import asyncio
+import logging
+import threading
+
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, TypeVar
+
+from common.utils.memoize import memoize
+
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar('T')
+
+# The Calendar API accepts at most 50 calls in one batch request.
+MAX_BATCH_SIZE = 50
+
+
+class CalendarServiceProvider:
+    """Runs Calendar API calls on a small thread pool, off the event loop.
+
+    The application default credentials are loaded once and refreshed under
+    a lock whenever they expire. The services built on them wrap an httplib2
+    connection, which is not thread-safe, so each pool thread builds and
+    then reuses its own service instead of one being built on every call.
+
+    A `service_factory` replaces the real service, e.g. with a
+    FakeCalendarService to run the tools offline.
+    """
+
+    def __init__(
+        self,
+        max_workers: int = 4,
+        service_factory: Callable[[], Any] | None = None,
+    ):
+        self.service_factory = service_factory
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix='calendar'
+        )
+        self._local = threading.local()
+        self._credentials = None
+        self._credentials_lock = threading.Lock()
+
+    def _get_credentials(self):
+        import google.auth
+        import google.auth.transport.requests
+
+        with self._credentials_lock:
+            if self._credentials is None:
+                self._credentials, _ = google.auth.default()
+            if not self._credentials.valid:
+                self._credentials.refresh(
+                    google.auth.transport.requests.Request()
+                )
+            return self._credentials
+
+    def _build_service(self):
+        from langchain_google_community.calendar.utils import (
+            build_resource_service,
+        )
+
+        return build_resource_service(credentials=self._get_credentials())
+
+    def get_service(self):
+        """Returns the service of the calling thread, building it once."""
+        if self.service_factory is not None:
+            return self.service_factory()
+        service = getattr(self._local, 'service', None)
+        if service is None:
+            service = self._local.service = self._build_service()
+        else:
+            # Refreshed ahead of the call, under the lock, rather than by
+            # each thread's connection racing to do it.
+            self._get_credentials()
+        return service
+
+    async def run(self, call: Callable[[Any], T]) -> T:
+        """Runs `call(service)` on the pool and returns its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, lambda: call(self.get_service())
+        )
+
+    async def get_events(
+        self, calendar_id: str, event_ids: list[str]
+    ) -> dict[str, dict | Exception]:
+        """Fetches several events of a calendar with batch requests.
+
+        Returns:
+          The event resource, or the exception its call failed with, by
+          event id.
+        """
+        event_ids = list(dict.fromkeys(event_ids))
+
+        def fetch(service) -> dict[str, dict | Exception]:
+            results: dict[str, dict | Exception] = {}
+
+            def on_response(request_id, response, exception):
+                results[request_id] = (
+                    exception if exception is not None else response
+                )
+
+            for start in range(0, len(event_ids), MAX_BATCH_SIZE):
+                batch = service.new_batch_http_request(callback=on_response)
+                for event_id in event_ids[start : start + MAX_BATCH_SIZE]:
+                    batch.add(
+                        service.events().get(
+                            calendarId=calendar_id, eventId=event_id
+                        ),
+                        request_id=event_id,
+                    )
+                batch.execute()
+            return results
+
+        return await self.run(fetch)
+
+
+_provider: CalendarServiceProvider | None = None
+_provider_lock = threading.Lock()
+
+
+def get_calendar_service_provider() -> CalendarServiceProvider:
+    """Returns the process-wide CalendarServiceProvider."""
+    global _provider
+    if _provider is None:
+        with _provider_lock:
+            if _provider is None:
+                _provider = CalendarServiceProvider()
+    return _provider
+
+
+def set_calendar_service_factory(factory: Callable[[], Any] | None) -> None:
+    """Makes the process-wide provider use `factory`, or real services again."""
+    get_calendar_service_provider().service_factory = factory
+
+
+def _attendee_emails(event: dict) -> list:
+    attendees = event.get('attendees', [])
+    return [
+        attendee.get('email') for attendee in attendees if 'email' in attendee
+    ]
+
+
+# Tools of the calendar agents, whose docstrings the model reads.
+
+
+@memoize(ttl=60)
+async def get_event_attendees(calendar_id: str, event_id: str) -> list:
+    """Fetches the attendees of a specific Google Calendar event.
+
+    Args:
+        calendar_id (str): The ID of the calendar containing the event.
+          (email address)
+        event_id (str): The ID of the event.
+
+    Returns:
+        list: A list of attendee email addresses, or an empty list if none.
+    """
+    event = await get_calendar_service_provider().run(
+        lambda service: service.events()
+        .get(calendarId=calendar_id, eventId=event_id)
+        .execute()
+    )
+    return _attendee_emails(event)
+
+
+@memoize(ttl=60)
+async def get_events_attendees(calendar_id: str, event_ids: list[str]) -> dict:
+    """Fetches the attendees of several events of a Google Calendar at once.
+
+    The events are fetched in one batch request.
+
+    Args:
+        calendar_id (str): The ID of the calendar containing the events.
+          (email address)
+        event_ids (list[str]): The IDs of the events.
+
+    Returns:
+        dict: The list of attendee email addresses of each event, by event
+          ID, or an error message for events that could not be fetched.
+    """
+    events = await get_calendar_service_provider().get_events(
+        calendar_id, event_ids
+    )
+    return {
+        event_id: f'Error: {event}'
+        if isinstance(event, Exception)
+        else _attendee_emails(event)
+        for event_id, event in events.items()
+    }
+
+
+class _FakeRequest:
+    def __init__(self, call: Callable[[], Any]):
+        self._call = call
+
+    def execute(self):
+        return self._call()
+
+
+class _FakeEvents:
+    def __init__(self, events: dict[tuple[str, str], dict]):
+        self._events = events
+
+    def get(self, calendarId: str, eventId: str) -> _FakeRequest:
+        def call():
+            if (calendarId, eventId) not in self._events:
+                raise LookupError(f'Event {eventId} not found in {calendarId}')
+            return self._events[(calendarId, eventId)]
+
+        return _FakeRequest(call)
+
+
+class _FakeBatch:
+    def __init__(self, callback):
+        self._callback = callback
+        self._requests: list[tuple[str, _FakeRequest]] = []
+
+    def add(self, request: _FakeRequest, request_id: str):
+        self._requests.append((request_id, request))
+
+    def execute(self):
+        for request_id, request in self._requests:
+            try:
+                response, exception = request.execute(), None
+            except Exception as e:
+                response, exception = None, e
+            self._callback(request_id, response, exception)
+
+
+class FakeCalendarService:
+    """An offline stand-in for the parts of the Calendar API the tools use.
+
+    Serves `events`, keyed by (calendar id, event id), through
+    `events().get(...)` and batch requests.
+    """
+
+    def __init__(self, events: dict[tuple[str, str], dict] | None = None):
+        self.events_by_id = events or {}
+
+    def events(self) -> _FakeEvents:
+        return _FakeEvents(self.events_by_id)
+
+    def new_batch_http_request(self, callback=None) -> _FakeBatch:
+        return _FakeBatch(callback)
@@ -0,0 +1,83 @@
+"""On-disk JSON cache utility."""
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+from typing import Any
+
+
+logger = logging.getLogger(__name__)
+
+
+class DiskCache:
+    """A small persistent cache of JSON-serializable values.
+
+    Each key is stored in its own file under `directory`, named after the
+    hash of the key. Writes are atomic, so concurrent readers, including
+    other processes, never observe a partially written entry.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = os.path.expanduser(directory)
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, f'{digest}.json')
+
+    def get(self, key: str, default: Any = None) -> Any:
+        """Get the value stored for a key.
+
+        Args:
+            key: The key for the data.
+            default: The value to return if the key is not cached.
+
+        Returns:
+            The cached value, or the default value if not found or unreadable.
+        """
+        try:
+            with open(self._path(key), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return default
+        except (OSError, ValueError) as e:
+            logger.warning(f'Ignoring unreadable cache entry for {key}: {e}')
+            return default
+
+    def set(self, key: str, value: Any) -> None:
+        """Store a value for a key, replacing any previous one.
+
+        Args:
+            key: The key for the data.
+            value: The JSON-serializable data to store.
+        """
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+            try:
+                with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                    json.dump(value, f)
+                os.replace(tmp_path, self._path(key))
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+        except OSError as e:
+            # The cache is an optimization; failing to persist is not fatal.
+            logger.warning(f'Failed to write cache entry for {key}: {e}')
+
+    def delete(self, key: str) -> bool:
+        """Delete the value stored for a key.
+
+        Args:
+            key: The key to delete.
+
+        Returns:
+            True if the key was found and deleted, False otherwise.
+        """
+        try:
+            os.remove(self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
@@ -1,49 +1,136 @@
 """In Memory Cache utility."""
 
+import heapq
+import sys
 import threading
 import time
+import weakref
 
+from collections import OrderedDict
+from collections.abc import Callable
 from typing import Any, Optional
 
 
-class InMemoryCache:
-    """A thread-safe Singleton class to manage cache data.
+def _split(limit: int | None, parts: int) -> list[int | None]:
+    """Splits a limit into `parts` shares that differ by at most one."""
+    if limit is None:
+        return [None] * parts
+    share, remainder = divmod(limit, parts)
+    return [share + (i < remainder) for i in range(parts)]
 
-    Ensures only one instance of the cache exists across the application.
-    """
 
-    _instance: Optional['InMemoryCache'] = None
-    _lock: threading.Lock = threading.Lock()
-    _initialized: bool = False
+class _Shard:
+    """One independently locked part of a ShardedCache."""
 
-    def __new__(cls):
-        """Override __new__ to control instance creation (Singleton pattern).
+    def __init__(self, max_entries: int | None, max_bytes: int | None):
+        self.lock = threading.Lock()
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bounded = max_entries is not None or max_bytes is not None
+        # key -> (value, expires_at, size). Only a bounded shard keeps them
+        # in LRU order, least recently used first, which costs a reordering
+        # on every hit.
+        self.entries: dict[str, tuple[Any, float | None, int]] = (
+            OrderedDict() if self.bounded else {}
+        )
+        # (expires_at, key) for every entry with a TTL, at the latest when
+        # it expires: an entry that is set again to expire later keeps its
+        # item, which is moved to the new expiry once it is popped. Items of
+        # entries evicted or deleted since are skipped when popped, and
+        # dropped whenever they come to outnumber the live ones.
+        self.expiry_heap: list[tuple[float, str]] = []
+        self.size = 0
+        # Counted per shard, under its lock, so no increments are lost.
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
 
-        Uses a lock to ensure thread safety during the first instantiation.
+    def remove(self, key: str) -> bool:
+        entry = self.entries.pop(key, None)
+        if entry is None:
+            return False
+        self.size -= entry[2]
+        return True
 
-        Returns:
-            The singleton instance of InMemoryCache.
+    def compact_expiry_heap(self) -> None:
+        """Rebuilds the expiry heap once it is mostly stale entries.
+
+        Rebuilding is linear in the number of entries and only happens after
+        as many stale entries piled up, so the heap stays within twice the
+        size of the shard at an amortized constant cost per operation.
         """
-        if cls._instance is None:
-            with cls._lock:
-                if cls._instance is None:
-                    cls._instance = super().__new__(cls)
-        return cls._instance
+        if len(self.expiry_heap) <= 2 * len(self.entries) + 16:
+            return
+        self.expiry_heap = [
+            (expires_at, key)
+            for key, (_, expires_at, _) in self.entries.items()
+            if expires_at is not None
+        ]
+        heapq.heapify(self.expiry_heap)
 
-    def __init__(self):
-        """Initialize the cache storage.
+    def evict(self) -> None:
+        """Evicts the least recently used entries down to the limits."""
+        entries = self.entries
+        while entries and (
+            (self.max_entries is not None and len(entries) > self.max_entries)
+            or (self.max_bytes is not None and self.size > self.max_bytes)
+        ):
+            _, (_, _, size) = entries.popitem(last=False)
+            self.size -= size
+            self.evictions += 1
 
-        Uses a flag (_initialized) to ensure this logic runs only on the very first
-        creation of the singleton instance.
-        """
-        if not self._initialized:
-            with self._lock:
-                if not self._initialized:
-                    # print("Initializing SessionCache storage")
-                    self._cache_data: dict[str, dict[str, Any]] = {}
-                    self._ttl: dict[str, float] = {}
-                    self._data_lock: threading.Lock = threading.Lock()
-                    self._initialized = True
+
+class ShardedCache:
+    """A thread-safe LRU cache with per-key TTL, split into locked shards.
+
+    Keys are spread over `num_shards` shards, each with its own lock, so
+    threads working on different keys rarely contend. A cache only used
+    from one event loop never contends, and is a little faster with a
+    single shard. When `max_entries`
+    or `max_bytes` is set, each shard holds its share of the limit and
+    evicts its least recently used entries to stay within it; the shares
+    add up to exactly the limit, and there are never more shards than
+    it allows for. Entry sizes are measured with `sizeof`,
+    `sys.getsizeof` by default.
+
+    Expired entries are never returned. They are also removed every
+    `sweep_interval` seconds by a background thread, started with the first
+    entry that has a TTL, so that they do not pile up when never read again.
+    """
+
+    def __init__(
+        self,
+        num_shards: int = 16,
+        max_entries: int | None = None,
+        max_bytes: int | None = None,
+        sweep_interval: float = 1.0,
+        sizeof: Callable[[Any], int] = sys.getsizeof,
+    ):
+        if num_shards < 1:
+            raise ValueError('num_shards must be at least 1')
+        limits = {'max_entries': max_entries, 'max_bytes': max_bytes}
+        for name, limit in limits.items():
+            if limit is not None:
+                if limit < 1:
+                    raise ValueError(f'{name} must be at least 1')
+                num_shards = min(num_shards, limit)
+        self._shards = [
+            _Shard(shard_entries, shard_bytes)
+            for shard_entries, shard_bytes in zip(
+                _split(max_entries, num_shards), _split(max_bytes, num_shards)
+            )
+        ]
+        self._num_shards = num_shards
+        self._measure_sizes = max_bytes is not None
+        self._sizeof = sizeof
+        self._sweep_interval = sweep_interval
+        self._sweeper: threading.Thread | None = None
+        self._sweeper_lock = threading.Lock()
+        self._closed = threading.Event()
+
+    def _shard(self, key: str) -> _Shard:
+        return self._shards[hash(key) % self._num_shards]
 
     def set(self, key: str, value: Any, ttl: int | None = None) -> None:
         """Set a key-value pair.
@@ -53,32 +140,55 @@ class InMemoryCache:
             value: The data to store.
             ttl: Time to live in seconds. If None, data will not expire.
         """
-        with self._data_lock:
-            self._cache_data[key] = value
-
-            if ttl is not None:
-                self._ttl[key] = time.time() + ttl
-            elif key in self._ttl:
-                del self._ttl[key]
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        size = self._sizeof(value) if self._measure_sizes else 0
+        shard = self._shards[hash(key) % self._num_shards]
+        with shard.lock:
+            previous = shard.entries.pop(key, None)
+            if previous is not None:
+                shard.size -= previous[2]
+            shard.entries[key] = (value, expires_at, size)
+            shard.size += size
+            if expires_at is not None and (
+                previous is None
+                or previous[1] is None
+                or previous[1] > expires_at
+            ):
+                heapq.heappush(shard.expiry_heap, (expires_at, key))
+                shard.compact_expiry_heap()
+            if shard.bounded:
+                shard.evict()
+        if expires_at is not None and self._sweeper is None:
+            self._start_sweeper()
 
     def get(self, key: str, default: Any = None) -> Any:
         """Get the value associated with a key.
 
         Args:
-            key: The key for the data within the session.
-            default: The value to return if the session or key is not found.
+            key: The key for the data.
+            default: The value to return if the key is not found.
 
         Returns:
             The cached value, or the default value if not found.
         """
-        with self._data_lock:
-            if key in self._ttl and time.time() > self._ttl[key]:
-                del self._cache_data[key]
-                del self._ttl[key]
+        # The shard is looked up inline: this is the hottest path.
+        shard = self._shards[hash(key) % self._num_shards]
+        with shard.lock:
+            entry = shard.entries.get(key)
+            if entry is None:
+                shard.misses += 1
                 return default
-            return self._cache_data.get(key, default)
+            if entry[1] is not None and entry[1] <= time.monotonic():
+                shard.remove(key)
+                shard.expirations += 1
+                shard.misses += 1
+                return default
+            if shard.bounded:
+                shard.entries.move_to_end(key)
+            shard.hits += 1
+            return entry[0]
 
-    def delete(self, key: str) -> None:
+    def delete(self, key: str) -> bool:
         """Delete a specific key-value pair from a cache.
 
         Args:
@@ -87,13 +197,11 @@ class InMemoryCache:
         Returns:
             True if the key was found and deleted, False otherwise.
         """
-        with self._data_lock:
-            if key in self._cache_data:
-                del self._cache_data[key]
-                if key in self._ttl:
-                    del self._ttl[key]
-                return True
-            return False
+        shard = self._shard(key)
+        with shard.lock:
+            removed = shard.remove(key)
+            shard.compact_expiry_heap()
+            return removed
 
     def clear(self) -> bool:
         """Remove all data.
@@ -101,8 +209,124 @@ class InMemoryCache:
         Returns:
             True if the data was cleared, False otherwise.
         """
-        with self._data_lock:
-            self._cache_data.clear()
-            self._ttl.clear()
-            return True
-        return False
+        for shard in self._shards:
+            with shard.lock:
+                shard.entries.clear()
+                shard.expiry_heap.clear()
+                shard.size = 0
+        return True
+
+    # The shard locks are only ever held for a few dictionary operations, so
+    # the cache can be used directly from coroutines without blocking the
+    # event loop; these aliases let async callers say so.
+    async def aget(self, key: str, default: Any = None) -> Any:
+        return self.get(key, default)
+
+    async def aset(self, key: str, value: Any, ttl: int | None = None) -> None:
+        self.set(key, value, ttl)
+
+    async def adelete(self, key: str) -> bool:
+        return self.delete(key)
+
+    def __len__(self) -> int:
+        return sum(len(shard.entries) for shard in self._shards)
+
+    def sweep(self) -> int:
+        """Removes all expired entries and returns how many there were."""
+        now = time.monotonic()
+        removed = 0
+        for shard in self._shards:
+            with shard.lock:
+                heap = shard.expiry_heap
+                while heap and heap[0][0] <= now:
+                    _, key = heapq.heappop(heap)
+                    entry = shard.entries.get(key)
+                    if entry is None or entry[1] is None:
+                        continue
+                    if entry[1] <= now:
+                        shard.remove(key)
+                        shard.expirations += 1
+                        removed += 1
+                    else:
+                        # Set again since, to expire later.
+                        heapq.heappush(heap, (entry[1], key))
+        return removed
+
+    def _start_sweeper(self) -> None:
+        with self._sweeper_lock:
+            if self._sweeper is not None or self._closed.is_set():
+                return
+            # The thread only holds a weak reference, so that a cache that is
+            # no longer used can still be garbage collected.
+            self._sweeper = threading.Thread(
+                target=self._sweep_periodically,
+                args=(weakref.ref(self), self._closed, self._sweep_interval),
+                name='cache-sweeper',
+                daemon=True,
+            )
+            self._sweeper.start()
+
+    @staticmethod
+    def _sweep_periodically(
+        cache_ref: 'weakref.ref[ShardedCache]',
+        closed: threading.Event,
+        interval: float,
+    ) -> None:
+        while not closed.wait(interval):
+            cache = cache_ref()
+            if cache is None:
+                return
+            cache.sweep()
+            del cache
+
+    def close(self) -> None:
+        """Stops the background sweeper."""
+        self._closed.set()
+
+    def metrics(self) -> dict[str, Any]:
+        return {
+            'entries': len(self),
+            'bytes': sum(shard.size for shard in self._shards),
+            'hits': sum(shard.hits for shard in self._shards),
+            'misses': sum(shard.misses for shard in self._shards),
+            'evictions': sum(shard.evictions for shard in self._shards),
+            'expirations': sum(shard.expirations for shard in self._shards),
+        }
+
+
+class InMemoryCache(ShardedCache):
+    """A thread-safe Singleton class to manage cache data.
+
+    Ensures only one instance of the cache exists across the application.
+    """
+
+    _instance: Optional['InMemoryCache'] = None
+    _lock: threading.Lock = threading.Lock()
+    _initialized: bool = False
+
+    def __new__(cls, *args, **kwargs):
+        """Override __new__ to control instance creation (Singleton pattern).
+
+        Uses a lock to ensure thread safety during the first instantiation.
+
+        Returns:
+            The singleton instance of InMemoryCache.
+        """
+        if cls._instance is None:
+            with cls._lock:
+                if cls._instance is None:
+                    cls._instance = super().__new__(cls)
+        return cls._instance
+
+    def __init__(self, **kwargs):
+        """Initialize the cache storage.
+
+        Uses a flag (_initialized) to ensure this logic runs only on the very first
+        creation of the singleton instance, which alone can set the limits
+        accepted by ShardedCache.
+        """
+        if not self._initialized:
+            with self._lock:
+                if not self._initialized:
+                    super().__init__(**kwargs)
+                    self._initialized = True
@@ -0,0 +1,211 @@
+"""Memoization of expensive tool calls on top of InMemoryCache."""
+
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import threading
+
+from collections.abc import Callable, Iterable
+from concurrent.futures import Future
+from typing import Any
+
+from common.utils.in_memory_cache import InMemoryCache, ShardedCache
+
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+
+
+def _copy_error(error: Exception) -> Exception:
+    # Built without calling __init__, whose signature may not match the
+    # exception's args, and without the traceback of the original.
+    copied = type(error).__new__(type(error), *error.args)
+    copied.__dict__.update(getattr(error, '__dict__', {}))
+    return copied
+
+
+class _CachedError:
+    """Holds a cached exception, of which every cache hit raises a copy.
+
+    Raising one object over and over would grow its traceback on every hit
+    and keep the frames of all its callers alive for as long as it is
+    cached.
+    """
+
+    def __init__(self, error: Exception):
+        self.error = _copy_error(error)
+
+    def raise_copy(self):
+        raise _copy_error(self.error)
+
+
+def _normalize(value: Any) -> Any:
+    if isinstance(value, str):
+        return value.strip()
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(item) for item in value]
+    if hasattr(value, 'model_dump'):
+        return _normalize(value.model_dump(mode='json'))
+    return value
+
+
+def memoize(
+    ttl: float | None = 300.0,
+    negative_ttl: float | None = None,
+    is_negative: Callable[[Any], bool] | None = None,
+    cache_errors: tuple[type[Exception], ...] = (Exception,),
+    ignore: Iterable[str] = (),
+    normalize: Callable[[dict[str, Any]], dict[str, Any]] | None = None,
+    cache: ShardedCache | None = None,
+):
+    """Memoizes a sync or async function by its normalized arguments.
+
+    The arguments are bound to the function's signature, so positional and
+    keyword spellings of the same call share an entry, and surrounding
+    whitespace is stripped from strings. Arguments named in `ignore` are
+    left out of the key; `normalize` can rewrite the remaining arguments
+    further, e.g. to lowercase an email.
+
+    Concurrent calls with the same key are collapsed into one execution
+    whose result, or exception, all of them receive. That execution, like
+    a cache hit, does not see the ignored arguments of the other calls:
+    the function only ever runs with those of the call that started it.
+    So only ignore arguments the function does not act on; an ADK
+    `tool_context` it writes state through must not be ignored, or the
+    writes of joined calls would go to another session.
+
+    Results are cached for `ttl` seconds. With `negative_ttl`, exceptions
+    of the `cache_errors` types and the results for which `is_negative`
+    returns True are cached for that long instead, so that a failing lookup
+    is not retried on every call; otherwise they are not cached at all.
+
+    Cached values are shared between callers and must not be mutated.
+
+    Args:
+        ttl: Seconds to keep results for, or None to keep them until evicted.
+        negative_ttl: Seconds to keep exceptions and negative results for.
+        is_negative: Tells whether a result is negative, e.g. empty.
+        cache_errors: The exceptions to cache, leaving out e.g. transient
+          errors that the next call should retry.
+        ignore: Names of arguments that neither affect the result nor are
+          used for side effects.
+        normalize: Rewrites the bound arguments before they are hashed.
+        cache: The cache to use, the InMemoryCache singleton by default.
+    """
+    ignored = frozenset(ignore)
+
+    def decorator(func):
+        signature = inspect.signature(func)
+        prefix = f'memoize:{func.__module__}.{func.__qualname__}:'
+        store = cache if cache is not None else InMemoryCache()
+
+        def make_key(args, kwargs) -> str:
+            bound = signature.bind(*args, **kwargs)
+            bound.apply_defaults()
+            arguments = {
+                name: value
+                for name, value in bound.arguments.items()
+                if name not in ignored
+            }
+            if normalize is not None:
+                arguments = normalize(arguments)
+            payload = json.dumps(
+                _normalize(arguments), sort_keys=True, default=repr
+            )
+            return prefix + hashlib.sha256(payload.encode()).hexdigest()
+
+        def lookup(key: str) -> tuple[bool, Any]:
+            value = store.get(key, _MISSING)
+            if value is _MISSING:
+                return False, None
+            if isinstance(value, _CachedError):
+                value.raise_copy()
+            return True, value
+
+        def store_result(key: str, result: Any) -> None:
+            if is_negative is not None and is_negative(result):
+                if negative_ttl is not None:
+                    store.set(key, result, ttl=negative_ttl)
+                return
+            store.set(key, result, ttl=ttl)
+
+        def store_error(key: str, error: Exception) -> None:
+            if negative_ttl is not None and isinstance(error, cache_errors):
+                store.set(key, _CachedError(error), ttl=negative_ttl)
+
+        if inspect.iscoroutinefunction(func):
+            # Running calls by key, per event loop.
+            in_flight: dict[tuple[int, str], asyncio.Task] = {}
+
+            async def run(key: str, args, kwargs):
+                try:
+                    result = await func(*args, **kwargs)
+                except Exception as e:
+                    store_error(key, e)
+                    raise
+                store_result(key, result)
+                return result
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                key = make_key(args, kwargs)
+                hit, value = lookup(key)
+                if hit:
+                    return value
+                flight_key = (id(asyncio.get_running_loop()), key)
+                task = in_flight.get(flight_key)
+                if task is None:
+                    task = asyncio.ensure_future(run(key, args, kwargs))
+                    in_flight[flight_key] = task
+                    task.add_done_callback(
+                        lambda _: in_flight.pop(flight_key, None)
+                    )
+                else:
+                    logger.debug(f'Joining in-flight call to {func.__name__}')
+                # Shielded, so that one cancelled caller does not cancel the
+                # call for everyone else waiting on it.
+                return await asyncio.shield(task)
+
+            return async_wrapper
+
+        sync_in_flight: dict[str, Future] = {}
+        sync_lock = threading.Lock()
+
+        @functools.wraps(func)
+        def sync_wrapper(*args, **kwargs):
+            key = make_key(args, kwargs)
+            hit, value = lookup(key)
+            if hit:
+                return value
+            with sync_lock:
+                future = sync_in_flight.get(key)
+                leader = future is None
+                if leader:
+                    future = sync_in_flight[key] = Future()
+            if not leader:
+                logger.debug(f'Joining in-flight call to {func.__name__}')
+                return future.result()
+            try:
+                result = func(*args, **kwargs)
+            except BaseException as e:
+                if isinstance(e, Exception):
+                    store_error(key, e)
+                future.set_exception(e)
+                raise
+            else:
+                store_result(key, result)
+                future.set_result(result)
+                return result
+            finally:
+                with sync_lock:
+                    sync_in_flight.pop(key, None)
+
+        return sync_wrapper
+
+    return decorator
@@ -1,16 +1,19 @@
+import asyncio
 import hashlib
 import json
 import logging
+import random
 import time
 import uuid
 
+from collections import OrderedDict, deque
 from typing import Any
 
 import httpx
 import jwt
 
 from jwcrypto import jwk
-from jwt import PyJWK, PyJWKClient
+from jwt import PyJWK, PyJWKSet
 from starlette.requests import Request
 from starlette.responses import JSONResponse
 
@@ -18,27 +21,70 @@ from starlette.responses import JSONResponse
 logger = logging.getLogger(__name__)
 AUTH_HEADER_PREFIX = 'Bearer '
 
+# The key generated for each supported signing algorithm. ES256 and EdDSA
+# sign an order of magnitude faster than RS256.
+SIGNING_KEY_PARAMS: dict[str, dict[str, Any]] = {
+    'RS256': {'kty': 'RSA', 'size': 2048},
+    'ES256': {'kty': 'EC', 'crv': 'P-256'},
+    'EdDSA': {'kty': 'OKP', 'crv': 'Ed25519'},
+}
 
-class PushNotificationAuth:
-    def _calculate_request_body_sha256(self, data: dict[str, Any]):
-        """Calculates the SHA256 hash of a request body.
 
-        This logic needs to be same for both the agent who signs the payload and the client verifier.
-        """
-        body_str = json.dumps(
+class PushNotificationAuth:
+    def _serialize_request_body(self, data: dict[str, Any]) -> bytes:
+        return json.dumps(
             data,
             ensure_ascii=False,
             allow_nan=False,
             indent=None,
             separators=(',', ':'),
-        )
-        return hashlib.sha256(body_str.encode()).hexdigest()
+        ).encode()
+
+    def _calculate_request_body_sha256(self, data: dict[str, Any]):
+        """Calculates the SHA256 hash of a request body.
+
+        This logic needs to be same for both the agent who signs the payload and the client verifier.
+        """
+        return hashlib.sha256(self._serialize_request_body(data)).hexdigest()
 
 
 class PushNotificationSenderAuth(PushNotificationAuth):
-    def __init__(self):
+    """Signs and sends push notifications.
+
+    Notifications are signed with a key for `algorithm`, one of
+    SIGNING_KEY_PARAMS, in a worker thread so that signing does not block
+    the event loop. The token signed for a body is reused for resends of
+    the same body within `token_ttl` seconds.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 10.0,
+        algorithm: str = 'RS256',
+        token_ttl: float = 60.0,
+    ):
+        if algorithm not in SIGNING_KEY_PARAMS:
+            raise ValueError(f'Unsupported signing algorithm: {algorithm}')
         self.public_keys = []
         self.private_key_jwk: PyJWK = None
+        self.timeout = timeout
+        self.algorithm = algorithm
+        self.token_ttl = token_ttl
+        self._http_client: httpx.AsyncClient | None = None
+        # Signed tokens with their iat, by request body digest.
+        self._tokens: OrderedDict[str, tuple[str, int]] = OrderedDict()
+
+    def _get_http_client(self) -> httpx.AsyncClient:
+        # One pooled client is shared by all notifications, created lazily so
+        # that it belongs to the event loop sending them.
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(timeout=self.timeout)
+        return self._http_client
+
+    async def aclose(self):
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
 
     @staticmethod
     async def verify_push_notification_url(url: str) -> bool:
@@ -64,7 +110,10 @@ class PushNotificationSenderAuth(PushNotificationAuth):
 
     def generate_jwk(self):
         key = jwk.JWK.generate(
-            kty='RSA', size=2048, kid=str(uuid.uuid4()), use='sig'
+            **SIGNING_KEY_PARAMS[self.algorithm],
+            kid=str(uuid.uuid4()),
+            use='sig',
+            alg=self.algorithm,
         )
         self.public_keys.append(key.export_public(as_dict=True))
         self.private_key_jwk = PyJWK.from_json(key.export_private())
@@ -79,41 +128,346 @@ class PushNotificationSenderAuth(PushNotificationAuth):
         Payload is signed with private key and it ensures the integrity of payload for client.
         Including iat prevents from replay attack.
         """
-        iat = int(time.time())
+        return self._sign(self._calculate_request_body_sha256(data))
 
+    def _sign(self, body_sha256: str, iat: int | None = None) -> str:
         return jwt.encode(
             {
-                'iat': iat,
-                'request_body_sha256': self._calculate_request_body_sha256(
-                    data
-                ),
+                'iat': int(time.time()) if iat is None else iat,
+                'request_body_sha256': body_sha256,
             },
             key=self.private_key_jwk,
             headers={'kid': self.private_key_jwk.key_id},
-            algorithm='RS256',
+            algorithm=self.algorithm,
         )
 
-    async def send_push_notification(self, url: str, data: dict[str, Any]):
-        jwt_token = self._generate_jwt(data)
-        headers = {'Authorization': f'Bearer {jwt_token}'}
-        async with httpx.AsyncClient(timeout=10) as client:
+    async def _get_jwt(self, body_sha256: str) -> str:
+        cached = self._tokens.get(body_sha256)
+        if cached is not None and time.time() - cached[1] < self.token_ttl:
+            return cached[0]
+        iat = int(time.time())
+        token = await asyncio.to_thread(self._sign, body_sha256, iat)
+        self._tokens[body_sha256] = (token, iat)
+        self._tokens.move_to_end(body_sha256)
+        while len(self._tokens) > 256:
+            self._tokens.popitem(last=False)
+        return token
+
+    async def post_push_notification(self, url: str, data: dict[str, Any]):
+        """Signs and posts a push notification, raising if it failed.
+
+        The body is serialized once, and the digest in the token is taken
+        over exactly the bytes that are sent.
+        """
+        body = self._serialize_request_body(data)
+        jwt_token = await self._get_jwt(hashlib.sha256(body).hexdigest())
+        headers = {
+            'Authorization': f'Bearer {jwt_token}',
+            'Content-Type': 'application/json',
+        }
+        response = await self._get_http_client().post(
+            url, content=body, headers=headers
+        )
+        response.raise_for_status()
+
+    async def send_push_notification(
+        self, url: str, data: dict[str, Any]
+    ) -> bool:
+        try:
+            await self.post_push_notification(url, data)
+            logger.info(f'Push-notification sent for URL: {url}')
+            return True
+        except Exception as e:
+            logger.warning(
+                f'Error during sending push-notification for URL {url}: {e}'
+            )
+            return False
+
+
+class _CircuitBreaker:
+    """Tracks the consecutive delivery failures of one URL."""
+
+    def __init__(self):
+        self.failures = 0
+        self.open_until = 0.0
+
+
+class PushNotificationDeliveryQueue:
+    """Delivers push notifications in the background.
+
+    Notifications are queued without blocking the caller and posted by a
+    pool of `workers` tasks through the pooled client of `sender_auth`.
+    Failed deliveries are retried up to `max_attempts` times with jittered
+    exponential backoff. After `breaker_threshold` consecutive failures a
+    URL's circuit opens for `breaker_reset` seconds: its notifications are
+    held back rather than sent, and once deliveries resume a single failure
+    opens it again, until one succeeds. At most `max_pending`
+    notifications are queued or awaiting a retry; further ones are dropped.
+
+    Each notification carries the whole task, so only the latest one for a
+    task and URL matters: the notifications of a task are posted one at a
+    time, and a queued or retrying one is dropped as soon as a newer one
+    was enqueued, so that a receiver never ends up with a stale state.
+    """
+
+    def __init__(
+        self,
+        sender_auth: PushNotificationSenderAuth,
+        workers: int = 4,
+        max_pending: int = 1000,
+        max_attempts: int = 5,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        breaker_threshold: int = 5,
+        breaker_reset: float = 30.0,
+    ):
+        self.sender_auth = sender_auth
+        self.workers = workers
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker_threshold = breaker_threshold
+        self.breaker_reset = breaker_reset
+        self._queue: asyncio.Queue | None = None
+        self._worker_tasks: list[asyncio.Task] = []
+        self._retry_handles: set[asyncio.TimerHandle] = set()
+        self._breakers: dict[str, _CircuitBreaker] = {}
+        # The sequence number of the latest notification, and the lock held
+        # while posting one, by (url, task id).
+        self._next_sequence = 0
+        self._latest: dict[tuple[str, Any], int] = {}
+        self._delivery_locks: dict[tuple[str, Any], asyncio.Lock] = {}
+        self._enqueued = 0
+        self._delivered = 0
+        self._failed_attempts = 0
+        self._retried = 0
+        self._dropped = 0
+        self._short_circuited = 0
+        self._superseded = 0
+        self._latencies: deque[float] = deque(maxlen=1000)
+        self._latency_max = 0.0
+
+    @property
+    def pending(self) -> int:
+        queued = self._queue.qsize() if self._queue is not None else 0
+        return queued + len(self._retry_handles)
+
+    def enqueue(self, url: str, data: dict[str, Any]) -> bool:
+        """Queues a notification, returning False if it was dropped."""
+        self._ensure_started()
+        if self.pending >= self.max_pending:
+            self._dropped += 1
+            logger.warning(f'Dropping push-notification for URL {url}')
+            return False
+        self._enqueued += 1
+        self._next_sequence += 1
+        self._latest[(url, data.get('id'))] = self._next_sequence
+        self._queue.put_nowait(
+            (url, data, self._next_sequence, 1, time.monotonic())
+        )
+        return True
+
+    async def aclose(self, timeout: float | None = 10.0):
+        """Waits up to `timeout` seconds for queued deliveries, then stops."""
+        if self._queue is not None:
             try:
-                response = await client.post(url, json=data, headers=headers)
-                response.raise_for_status()
-                logger.info(f'Push-notification sent for URL: {url}')
+                await asyncio.wait_for(self._queue.join(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning(
+                    f'Stopping with {self.pending} push-notifications pending'
+                )
+        for handle in self._retry_handles:
+            handle.cancel()
+        self._retry_handles.clear()
+        self._latest.clear()
+        self._delivery_locks.clear()
+        for worker in self._worker_tasks:
+            worker.cancel()
+        await asyncio.gather(*self._worker_tasks, return_exceptions=True)
+        self._worker_tasks = []
+        self._queue = None
+        await self.sender_auth.aclose()
+
+    def metrics(self) -> dict[str, Any]:
+        latencies = sorted(self._latencies)
+        return {
+            'pending': self.pending,
+            'enqueued': self._enqueued,
+            'delivered': self._delivered,
+            'failed_attempts': self._failed_attempts,
+            'retried': self._retried,
+            'dropped': self._dropped,
+            'short_circuited': self._short_circuited,
+            'superseded': self._superseded,
+            'open_circuits': sum(
+                breaker.open_until > time.monotonic()
+                for breaker in self._breakers.values()
+            ),
+            'latency_avg': (
+                sum(latencies) / len(latencies) if latencies else None
+            ),
+            'latency_p95': (
+                latencies[int(len(latencies) * 0.95)] if latencies else None
+            ),
+            'latency_max': self._latency_max,
+        }
+
+    def _ensure_started(self):
+        if self._queue is None:
+            self._queue = asyncio.Queue()
+        if not self._worker_tasks:
+            loop = asyncio.get_running_loop()
+            self._worker_tasks = [
+                loop.create_task(self._worker()) for _ in range(self.workers)
+            ]
+
+    async def _worker(self):
+        while True:
+            url, data, sequence, attempt, enqueued_at = await self._queue.get()
+            key = (url, data.get('id'))
+            lock = self._delivery_locks.setdefault(key, asyncio.Lock())
+            try:
+                async with lock:
+                    if self._latest.get(key) != sequence:
+                        self._superseded += 1
+                        if key not in self._latest:
+                            self._delivery_locks.pop(key, None)
+                        continue
+                    if await self._deliver(
+                        url, data, sequence, attempt, enqueued_at
+                    ):
+                        # Nothing newer is pending for the task.
+                        del self._latest[key]
+                        self._delivery_locks.pop(key, None)
             except Exception as e:
+                logger.error(f'Error while delivering push-notification: {e}')
+            finally:
+                self._queue.task_done()
+
+    async def _deliver(
+        self,
+        url: str,
+        data: dict[str, Any],
+        sequence: int,
+        attempt: int,
+        enqueued_at: float,
+    ) -> bool:
+        """Posts a notification, returning False if it will be retried."""
+        breaker = self._breakers.setdefault(url, _CircuitBreaker())
+        now = time.monotonic()
+        if breaker.open_until > now:
+            # Hold the notification back until the circuit may close again,
+            # without counting it as an attempt.
+            self._short_circuited += 1
+            self._schedule(
+                breaker.open_until - now,
+                url,
+                data,
+                sequence,
+                attempt,
+                enqueued_at,
+            )
+            return False
+
+        try:
+            await self.sender_auth.post_push_notification(url, data)
+        except Exception as e:
+            self._failed_attempts += 1
+            breaker.failures += 1
+            if breaker.failures >= self.breaker_threshold:
+                breaker.open_until = time.monotonic() + self.breaker_reset
+            if attempt >= self.max_attempts:
+                self._dropped += 1
                 logger.warning(
-                    f'Error during sending push-notification for URL {url}: {e}'
+                    f'Giving up push-notification for URL {url} after'
+                    f' {attempt} attempts: {e}'
                 )
+                return True
+            delay = min(
+                self.backoff_max, self.backoff_base * 2 ** (attempt - 1)
+            )
+            self._retried += 1
+            self._schedule(
+                delay * random.uniform(0.5, 1.0),
+                url,
+                data,
+                sequence,
+                attempt + 1,
+                enqueued_at,
+            )
+            return False
+
+        breaker.failures = 0
+        breaker.open_until = 0.0
+        latency = time.monotonic() - enqueued_at
+        self._delivered += 1
+        self._latencies.append(latency)
+        self._latency_max = max(self._latency_max, latency)
+        return True
+
+    def _schedule(self, delay: float, *item: Any):
+        def requeue():
+            self._retry_handles.discard(handle)
+            if self._queue is not None:
+                self._queue.put_nowait(item)
+
+        handle = asyncio.get_running_loop().call_later(delay, requeue)
+        self._retry_handles.add(handle)
 
 
 class PushNotificationReceiverAuth(PushNotificationAuth):
-    def __init__(self):
+    """Verifies the push notifications signed by a PushNotificationSenderAuth.
+
+    The sender's JWKS is fetched asynchronously and cached for `jwks_ttl`
+    seconds. A token signed with an unknown key id triggers a refetch, at
+    most every `jwks_min_refresh` seconds.
+    """
+
+    def __init__(
+        self,
+        jwks_ttl: float = 300.0,
+        jwks_min_refresh: float = 10.0,
+        algorithms: list[str] | None = None,
+    ):
         self.public_keys_jwks = []
-        self.jwks_client = None
+        self.jwks_url: str | None = None
+        self.jwks_ttl = jwks_ttl
+        self.jwks_min_refresh = jwks_min_refresh
+        self.algorithms = algorithms or list(SIGNING_KEY_PARAMS)
+        self._signing_keys: dict[str, PyJWK] = {}
+        self._jwks_fetched_at = 0.0
+        self._jwks_lock = asyncio.Lock()
 
     async def load_jwks(self, jwks_url: str):
-        self.jwks_client = PyJWKClient(jwks_url)
+        self.jwks_url = jwks_url
+        await self._refresh_jwks(0.0)
+
+    async def _refresh_jwks(self, min_age: float):
+        async with self._jwks_lock:
+            # Another caller may have refreshed the keys while we waited.
+            if time.monotonic() - self._jwks_fetched_at < min_age:
+                return
+            async with httpx.AsyncClient(timeout=10) as client:
+                response = await client.get(self.jwks_url)
+                response.raise_for_status()
+                jwks = response.json()
+            self.public_keys_jwks = jwks.get('keys', [])
+            self._signing_keys = {
+                key.key_id: key for key in PyJWKSet.from_dict(jwks).keys
+            }
+            self._jwks_fetched_at = time.monotonic()
+
+    async def _get_signing_key(self, kid: str | None) -> PyJWK:
+        age = time.monotonic() - self._jwks_fetched_at
+        if age > self.jwks_ttl:
+            await self._refresh_jwks(self.jwks_ttl)
+        elif kid not in self._signing_keys and age > self.jwks_min_refresh:
+            await self._refresh_jwks(self.jwks_min_refresh)
+        signing_key = self._signing_keys.get(kid)
+        if signing_key is None:
+            raise ValueError(f'Unknown signing key: {kid}')
+        return signing_key
 
     async def verify_push_notification(self, request: Request) -> bool:
         auth_header = request.headers.get('Authorization')
@@ -122,19 +476,30 @@ class PushNotificationReceiverAuth(PushNotificationAuth):
             return False
 
         token = auth_header[len(AUTH_HEADER_PREFIX) :]
-        signing_key = self.jwks_client.get_signing_key_from_jwt(token)
+        signing_key = await self._get_signing_key(
+            jwt.get_unverified_header(token).get('kid')
+        )
+        if signing_key.algorithm_name not in self.algorithms:
+            raise ValueError(
+                f'Signing algorithm not allowed: {signing_key.algorithm_name}'
+            )
 
         decode_token = jwt.decode(
             token,
             signing_key,
             options={'require': ['iat', 'request_body_sha256']},
-            algorithms=['RS256'],
+            algorithms=[signing_key.algorithm_name],
         )
 
-        actual_body_sha256 = self._calculate_request_body_sha256(
-            await request.json()
-        )
-        if actual_body_sha256 != decode_token['request_body_sha256']:
+        # Hash the raw body as sent, falling back to the canonical JSON form
+        # for senders that did not sign the exact bytes they sent.
+        body = await request.body()
+        expected_sha256 = decode_token['request_body_sha256']
+        if (
+            hashlib.sha256(body).hexdigest() != expected_sha256
+            and self._calculate_request_body_sha256(json.loads(body))
+            != expected_sha256
+        ):
             # Payload signature does not match the digest in signed token.
             raise ValueError('Invalid request body')
 
@@ -0,0 +1,118 @@
+import asyncio
+
+from collections.abc import AsyncIterable
+from typing import Any
+
+import httpx
+import pytest
+
+from common.server import A2AServer, ADKTaskManager
+from common.types import AgentCapabilities, AgentCard
+
+
+class FakeAgentWrapper:
+    """An AgentWrapper answering every query after `delay` seconds.
+
+    `started` is set once a call reaches the agent, and `released` once that
+    call has let go of its resources, whether it finished or was cancelled.
+    """
+
+    SUPPORTED_CONTENT_TYPES = ['text', 'text/plain']
+
+    def __init__(self, delay: float = 0.0, updates: int = 3):
+        self.delay = delay
+        self.updates = updates
+        self.started = asyncio.Event()
+        self.released = asyncio.Event()
+        self.active = 0
+
+    async def invoke(self, query: str, session_id: str) -> str:
+        self.started.set()
+        self.active += 1
+        try:
+            await asyncio.sleep(self.delay)
+            if query == 'fail':
+                raise RuntimeError('agent failed')
+            return f'answer to {query}'
+        finally:
+            self.active -= 1
+            self.released.set()
+
+    async def stream(
+        self, query: str, session_id: str
+    ) -> AsyncIterable[dict[str, Any]]:
+        self.started.set()
+        self.active += 1
+        try:
+            for i in range(self.updates):
+                await asyncio.sleep(self.delay)
+                if query == 'fail':
+                    raise RuntimeError('agent failed')
+                yield {'is_task_complete': False, 'updates': f'step {i}'}
+            yield {'is_task_complete': True, 'content': f'answer to {query}'}
+        finally:
+            self.active -= 1
+            self.released.set()
+
+
+def make_card(url: str = 'http://testserver/') -> AgentCard:
+    return AgentCard(
+        name='Fake Agent',
+        url=url,
+        version='1.0.0',
+        capabilities=AgentCapabilities(streaming=True),
+        skills=[],
+    )
+
+
+def send_request(
+    task_id: str,
+    text: str = 'hello',
+    method: str = 'tasks/send',
+    request_id: int | str = 1,
+    **params: Any,
+) -> dict[str, Any]:
+    return {
+        'jsonrpc': '2.0',
+        'id': request_id,
+        'method': method,
+        'params': {
+            'id': task_id,
+            'sessionId': 'session-1',
+            'message': {'role': 'user', 'parts': [{'type': 'text', 'text': text}]},
+            **params,
+        },
+    }
+
+
+def parse_sse(body: str) -> list[str]:
+    """Returns the data of each event of a text/event-stream body."""
+    return [
+        line[len('data:') :].strip()
+        for line in body.splitlines()
+        if line.startswith('data:')
+    ]
+
+
+@pytest.fixture
+def agent() -> FakeAgentWrapper:
+    return FakeAgentWrapper()
+
+
+@pytest.fixture
+def task_manager(agent) -> ADKTaskManager:
+    return ADKTaskManager(agent, cancel_timeout=1.0)
+
+
+@pytest.fixture
+def server(task_manager) -> A2AServer:
+    return A2AServer(agent_card=make_card(), task_manager=task_manager)
+
+
+@pytest.fixture
+async def client(server) -> AsyncIterable[httpx.AsyncClient]:
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=server.app),
+        base_url='http://testserver',
+    ) as client:
+        yield client
@@ -0,0 +1,42 @@
+import pytest
+
+from common.utils.calendar_service import (
+    FakeCalendarService,
+    get_event_attendees,
+    get_events_attendees,
+    set_calendar_service_factory,
+)
+
+
+@pytest.fixture
+def service():
+    service = FakeCalendarService(
+        {
+            ('team@comm-it.com', 'standup'): {
+                'attendees': [
+                    {'email': 'jon.doe@comm-it.com'},
+                    {'displayName': 'Room 1'},
+                ]
+            },
+            ('team@comm-it.com', 'review'): {},
+        }
+    )
+    set_calendar_service_factory(lambda: service)
+    yield service
+    set_calendar_service_factory(None)
+
+
+async def test_event_attendees_are_their_emails(service):
+    attendees = await get_event_attendees('team@comm-it.com', 'standup')
+
+    assert attendees == ['jon.doe@comm-it.com']
+
+
+async def test_events_attendees_report_missing_events(service):
+    attendees = await get_events_attendees(
+        'team@comm-it.com', ['standup', 'review', 'missing']
+    )
+
+    assert attendees['standup'] == ['jon.doe@comm-it.com']
+    assert attendees['review'] == []
+    assert attendees['missing'].startswith('Error: ')
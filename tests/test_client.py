@@ -0,0 +1,66 @@
+import pytest
+
+from common.client import A2AClient
+from common.types import (
+    GetTaskRequest,
+    TaskArtifactUpdateEvent,
+    TaskState,
+    TaskStatusUpdateEvent,
+)
+
+from .conftest import send_request
+
+
+@pytest.fixture
+async def a2a_client(client) -> A2AClient:
+    return A2AClient(url='http://testserver/', http_client=client)
+
+
+async def test_send_task(a2a_client):
+    response = await a2a_client.send_task(send_request('task-1')['params'])
+
+    assert response.result.status.state == TaskState.COMPLETED
+
+
+async def test_send_task_streaming(a2a_client):
+    events = [
+        response.result
+        async for response in a2a_client.send_task_streaming(
+            send_request('task-1')['params']
+        )
+    ]
+
+    assert any(isinstance(event, TaskArtifactUpdateEvent) for event in events)
+    assert isinstance(events[-1], TaskStatusUpdateEvent)
+    assert events[-1].final
+    assert events[-1].status.state == TaskState.COMPLETED
+
+
+async def test_streaming_error_is_a_response(a2a_client):
+    responses = [
+        response
+        async for response in a2a_client.resubscribe_task({'id': 'missing'})
+    ]
+
+    assert len(responses) == 1
+    assert responses[0].error.code == -32001
+
+
+async def test_batch_keeps_request_order(a2a_client):
+    await a2a_client.send_task(send_request('task-1')['params'])
+
+    responses = await a2a_client.batch(
+        [
+            GetTaskRequest(id=1, params={'id': 'missing'}),
+            GetTaskRequest(id=2, params={'id': 'task-1'}),
+        ]
+    )
+
+    assert responses[0].error.code == -32001
+    assert responses[1].result.status.state == TaskState.COMPLETED
+
+
+async def test_injected_http_client_is_not_closed(a2a_client, client):
+    await a2a_client.aclose()
+
+    assert not client.is_closed
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from common.utils.in_memory_cache import ShardedCache
+
+
+@pytest.mark.parametrize(
+    'num_shards, max_entries', [(16, 20), (16, 10), (4, 4), (3, 100), (1, 7)]
+)
+def test_shard_limits_add_up_to_max_entries(num_shards, max_entries):
+    cache = ShardedCache(num_shards=num_shards, max_entries=max_entries)
+
+    limits = [shard.max_entries for shard in cache._shards]
+
+    assert len(limits) == min(num_shards, max_entries)
+    assert sum(limits) == max_entries
+    assert max(limits) - min(limits) <= 1
+
+
+def test_never_holds_more_than_max_entries():
+    cache = ShardedCache(num_shards=16, max_entries=10)
+
+    for i in range(1000):
+        cache.set(f'key-{i}', i)
+
+    assert len(cache) <= 10
+    assert cache.metrics()['evictions'] >= 990
+
+
+def test_shard_byte_limits_add_up_to_max_bytes():
+    cache = ShardedCache(num_shards=16, max_bytes=1000, sizeof=len)
+
+    assert sum(shard.max_bytes for shard in cache._shards) == 1000
+    for i in range(100):
+        cache.set(f'key-{i}', 'x' * 30)
+    assert cache.metrics()['bytes'] <= 1000
+
+
+def test_rejects_limits_below_one():
+    with pytest.raises(ValueError):
+        ShardedCache(max_entries=0)
+
+
+def test_sweep_keeps_entries_set_again_to_expire_later():
+    cache = ShardedCache(num_shards=1)
+    cache.set('refreshed', 1, ttl=0.01)
+    cache.set('expiring', 2, ttl=0.01)
+    cache.set('refreshed', 3, ttl=60)
+
+    time.sleep(0.02)
+
+    assert cache.sweep() == 1
+    assert cache.get('refreshed') == 3
+    assert cache.get('expiring') is None
+    assert len(cache._shards[0].expiry_heap) == 1
+
+
+def test_sweep_removes_entries_set_again_to_expire_sooner():
+    cache = ShardedCache(num_shards=1)
+    cache.set('key', 1, ttl=60)
+    cache.set('key', 2, ttl=0.01)
+
+    time.sleep(0.02)
+
+    assert cache.sweep() == 1
+    assert len(cache) == 0
+
+
+def test_expiry_heap_stays_bounded_by_entries():
+    cache = ShardedCache(num_shards=1)
+
+    for i in range(10_000):
+        cache.set('key', i, ttl=60 - i * 0.001)
+
+    assert len(cache._shards[0].expiry_heap) <= 2 * len(cache) + 16
@@ -0,0 +1,99 @@
+import asyncio
+import socket
+
+import pytest
+import uvicorn
+
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import Response
+
+from common.server import ADKTaskManager
+from common.types import SendTaskRequest, TaskState
+from common.utils.push_notification_auth import (
+    PushNotificationDeliveryQueue,
+    PushNotificationReceiverAuth,
+    PushNotificationSenderAuth,
+)
+
+from .conftest import send_request
+
+
+@pytest.fixture
+async def webhook():
+    """Serves the sender's JWKS and a webhook verifying what it receives."""
+    sender_auth = PushNotificationSenderAuth(algorithm='ES256')
+    sender_auth.generate_jwk()
+    receiver_auth = PushNotificationReceiverAuth()
+    received: asyncio.Queue = asyncio.Queue()
+
+    async def on_notification(request: Request) -> Response:
+        verified = await receiver_auth.verify_push_notification(request)
+        await received.put((verified, await request.json()))
+        return Response(status_code=204)
+
+    app = Starlette()
+    app.add_route(
+        '/.well-known/jwks.json',
+        sender_auth.handle_jwks_endpoint,
+        methods=['GET'],
+    )
+    app.add_route('/notify', on_notification, methods=['POST'])
+
+    sock = socket.create_server(('127.0.0.1', 0))
+    base_url = f'http://127.0.0.1:{sock.getsockname()[1]}'
+    server = uvicorn.Server(uvicorn.Config(app, log_level='warning'))
+    serving = asyncio.create_task(server.serve(sockets=[sock]))
+    while not server.started:
+        await asyncio.sleep(0.01)
+    await receiver_auth.load_jwks(f'{base_url}/.well-known/jwks.json')
+
+    yield sender_auth, f'{base_url}/notify', received
+
+    server.should_exit = True
+    await serving
+    sock.close()
+
+
+async def test_send_delivers_push_notification_to_webhook(agent, webhook):
+    sender_auth, url, received = webhook
+    notifier = PushNotificationDeliveryQueue(sender_auth)
+    task_manager = ADKTaskManager(agent, push_notifier=notifier)
+    request = SendTaskRequest.model_validate(
+        send_request('task-1', pushNotification={'url': url})
+    )
+
+    reply = await task_manager.on_send_task(request)
+    verified, task = await asyncio.wait_for(received.get(), timeout=5)
+
+    assert reply.result.status.state == TaskState.COMPLETED
+    assert verified
+    assert task['id'] == 'task-1'
+    assert task['status']['state'] == TaskState.COMPLETED
+    await notifier.aclose()
+    assert notifier.metrics()['delivered'] == 1
+
+
+async def test_send_rejects_push_notification_without_notifier(agent):
+    task_manager = ADKTaskManager(agent)
+    request = SendTaskRequest.model_validate(
+        send_request('task-1', pushNotification={'url': 'http://example.com'})
+    )
+
+    reply = await task_manager.on_send_task(request)
+
+    assert reply.error.code == -32003
+    assert task_manager.tasks.get('task-1') is None
+
+
+async def test_send_rejects_invalid_push_notification_url(agent):
+    notifier = PushNotificationDeliveryQueue(PushNotificationSenderAuth())
+    task_manager = ADKTaskManager(agent, push_notifier=notifier)
+    request = SendTaskRequest.model_validate(
+        send_request('task-1', pushNotification={'url': 'file:///etc/passwd'})
+    )
+
+    reply = await task_manager.on_send_task(request)
+
+    assert reply.error.code == -32602
+    assert task_manager.tasks.get('task-1') is None
@@ -0,0 +1,231 @@
+import asyncio
+import json
+import socket
+
+import httpx
+
+from common.server import A2AServer, ADKTaskManager
+from common.server.utils import create_listening_socket
+from common.types import TaskState
+
+from .conftest import FakeAgentWrapper, make_card, parse_sse, send_request
+
+
+async def test_send_completes_task(client):
+    response = await client.post('/', json=send_request('task-1'))
+
+    assert response.status_code == 200
+    task = response.json()['result']
+    assert task['id'] == 'task-1'
+    assert task['status']['state'] == TaskState.COMPLETED
+    assert task['artifacts'][0]['parts'][0]['text'] == 'answer to hello'
+
+
+async def test_send_reports_agent_failure(client, task_manager):
+    response = await client.post('/', json=send_request('task-1', 'fail'))
+
+    assert response.json()['error']['code'] == -32603
+    task = task_manager.tasks.get('task-1')
+    assert task.status.state == TaskState.FAILED
+
+
+async def test_get_returns_stored_task(client):
+    await client.post('/', json=send_request('task-1'))
+
+    response = await client.post(
+        '/',
+        json={
+            'jsonrpc': '2.0',
+            'id': 2,
+            'method': 'tasks/get',
+            'params': {'id': 'task-1'},
+        },
+    )
+
+    assert response.json()['result']['status']['state'] == TaskState.COMPLETED
+
+
+async def test_send_subscribe_streams_updates(client):
+    response = await client.post(
+        '/', json=send_request('task-1', method='tasks/sendSubscribe')
+    )
+
+    assert response.headers['content-type'].startswith('text/event-stream')
+    events = [json.loads(data)['result'] for data in parse_sse(response.text)]
+    states = [event['status']['state'] for event in events if 'status' in event]
+    assert states == [TaskState.WORKING] * 3 + [TaskState.COMPLETED] * 2
+    assert events[-1]['final'] is True
+    artifacts = [event['artifact'] for event in events if 'artifact' in event]
+    assert artifacts[0]['parts'][0]['text'] == 'answer to hello'
+
+
+async def test_resubscribe_replays_finished_stream(client):
+    await client.post(
+        '/', json=send_request('task-1', method='tasks/sendSubscribe')
+    )
+
+    response = await client.post(
+        '/',
+        json={
+            'jsonrpc': '2.0',
+            'id': 2,
+            'method': 'tasks/resubscribe',
+            'params': {'id': 'task-1', 'lastSequence': 2},
+        },
+    )
+
+    events = [json.loads(data) for data in parse_sse(response.text)]
+    assert events
+    assert all(event['id'] == 2 for event in events)
+    assert events[-1]['result']['status']['state'] == TaskState.COMPLETED
+    assert events[-1]['result']['final'] is True
+
+
+async def test_resubscribe_to_unknown_task(client):
+    response = await client.post(
+        '/',
+        json={
+            'jsonrpc': '2.0',
+            'id': 2,
+            'method': 'tasks/resubscribe',
+            'params': {'id': 'missing'},
+        },
+    )
+
+    assert response.json()['error']['code'] == -32001
+
+
+async def test_cancel_stops_running_task(client, agent, task_manager):
+    agent.delay = 30.0
+    send = asyncio.ensure_future(client.post('/', json=send_request('task-1')))
+    await asyncio.wait_for(agent.started.wait(), timeout=5)
+
+    response = await client.post(
+        '/',
+        json={
+            'jsonrpc': '2.0',
+            'id': 2,
+            'method': 'tasks/cancel',
+            'params': {'id': 'task-1'},
+        },
+    )
+
+    assert response.json()['result']['status']['state'] == TaskState.CANCELED
+    assert agent.released.is_set()
+    assert agent.active == 0
+    reply = await asyncio.wait_for(send, timeout=5)
+    assert reply.json()['result']['status']['state'] == TaskState.CANCELED
+    assert 'task-1' not in task_manager.running_tasks
+
+
+async def test_cancel_finished_task_is_rejected(client):
+    await client.post('/', json=send_request('task-1'))
+
+    response = await client.post(
+        '/',
+        json={
+            'jsonrpc': '2.0',
+            'id': 2,
+            'method': 'tasks/cancel',
+            'params': {'id': 'task-1'},
+        },
+    )
+
+    assert response.json()['error']['code'] == -32002
+
+
+async def test_admission_rejects_tasks_over_capacity():
+    agent = FakeAgentWrapper(delay=30.0)
+    server = A2AServer(
+        agent_card=make_card(),
+        task_manager=ADKTaskManager(agent),
+        max_in_flight_tasks=1,
+    )
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=server.app),
+        base_url='http://testserver',
+    ) as client:
+        running = asyncio.ensure_future(
+            client.post('/', json=send_request('task-1'))
+        )
+        await asyncio.wait_for(agent.started.wait(), timeout=5)
+
+        response = await client.post('/', json=send_request('task-2'))
+
+        assert response.status_code == 503
+        assert int(response.headers['Retry-After']) >= 1
+        assert response.json()['error']['data']['retryAfter'] >= 1
+        assert server.admission.metrics()['in_flight'] == 1
+
+        running.cancel()
+        await asyncio.gather(running, return_exceptions=True)
+
+
+async def test_agent_card_advertises_admission_limits():
+    server = A2AServer(
+        agent_card=make_card(),
+        task_manager=ADKTaskManager(FakeAgentWrapper()),
+        max_in_flight_tasks=2,
+        max_queued_tasks=3,
+    )
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=server.app),
+        base_url='http://testserver',
+    ) as client:
+        response = await client.get('/.well-known/agent.json')
+        capabilities = response.json()['capabilities']
+        assert capabilities['maxConcurrentTasks'] == 2
+        assert capabilities['maxQueuedTasks'] == 3
+
+        cached = await client.get(
+            '/.well-known/agent.json',
+            headers={'If-None-Match': response.headers['ETag']},
+        )
+        assert cached.status_code == 304
+
+
+async def test_batch_answers_each_request(client):
+    response = await client.post(
+        '/',
+        json=[
+            send_request('task-1', request_id=1),
+            send_request('task-2', 'fail', request_id=2),
+            send_request('task-3', method='tasks/sendSubscribe', request_id=3),
+            {'jsonrpc': '2.0', 'id': 4, 'method': 'tasks/unknown'},
+        ],
+    )
+
+    responses = {item['id']: item for item in response.json()}
+    assert responses[1]['result']['status']['state'] == TaskState.COMPLETED
+    assert responses[2]['error']['code'] == -32603
+    assert responses[3]['error']['code'] == -32004
+    assert responses[4]['error']['code'] == -32600
+
+
+async def test_empty_batch_is_rejected(client):
+    response = await client.post('/', json=[])
+
+    assert response.status_code == 400
+    assert response.json()['error']['code'] == -32600
+
+
+async def test_listening_socket_disables_nagle_on_connections():
+    loop = asyncio.get_running_loop()
+    sock = create_listening_socket('127.0.0.1', 0)
+    nodelay = loop.create_future()
+
+    class Protocol(asyncio.Protocol):
+        def connection_made(self, transport):
+            nodelay.set_result(
+                transport.get_extra_info('socket').getsockopt(
+                    socket.IPPROTO_TCP, socket.TCP_NODELAY
+                )
+            )
+
+    server = await loop.create_server(Protocol, sock=sock)
+    _, writer = await asyncio.open_connection(*sock.getsockname())
+
+    assert await asyncio.wait_for(nodelay, timeout=5)
+    writer.close()
+    server.close()
+    await server.wait_closed()
@@ -0,0 +1,46 @@
+import asyncio
+
+from common.types import (
+    CancelTaskRequest,
+    SendTaskRequest,
+    TaskIdParams,
+    TaskSendParams,
+    TaskState,
+)
+
+from .conftest import send_request
+
+
+async def test_cancel_releases_the_runner_of_a_blocking_send(
+    agent, task_manager
+):
+    agent.delay = 30.0
+    request = SendTaskRequest.model_validate(send_request('task-1'))
+    send = asyncio.ensure_future(task_manager.on_send_task(request))
+    await asyncio.wait_for(agent.started.wait(), timeout=5)
+
+    canceled = await task_manager.on_cancel_task(
+        CancelTaskRequest(id=2, params=TaskIdParams(id='task-1'))
+    )
+    reply = await asyncio.wait_for(send, timeout=5)
+
+    assert agent.released.is_set()
+    assert agent.active == 0
+    assert 'task-1' not in task_manager.running_tasks
+    assert canceled.result.status.state == TaskState.CANCELED
+    assert reply.result.status.state == TaskState.CANCELED
+    # The reply is a snapshot, not the stored task itself.
+    assert reply.result is not task_manager.tasks.get('task-1')
+
+
+async def test_send_reply_keeps_requested_history(agent, task_manager):
+    params = TaskSendParams.model_validate(
+        send_request('task-1', historyLength=1)['params']
+    )
+
+    reply = await task_manager.on_send_task(
+        SendTaskRequest(id=1, params=params)
+    )
+
+    assert reply.result.status.state == TaskState.COMPLETED
+    assert len(reply.result.history) == 1
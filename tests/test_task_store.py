@@ -0,0 +1,89 @@
+import asyncio
+import os
+import sqlite3
+import time
+
+import pytest
+
+from common.server import SQLiteTaskStore
+from common.types import Message, Task, TaskState, TaskStatus, TextPart
+
+
+def make_task(task_id: str, text: str = 'hello') -> Task:
+    message = Message(role='user', parts=[TextPart(text=text)])
+    return Task(
+        id=task_id,
+        sessionId='session-1',
+        status=TaskStatus(state=TaskState.WORKING),
+        history=[message],
+    )
+
+
+@pytest.fixture
+def path(tmp_path) -> str:
+    return str(tmp_path / 'tasks.db')
+
+
+async def test_failed_flush_is_retried_with_backoff(path, monkeypatch):
+    store = SQLiteTaskStore(path, flush_interval=0.01)
+    write_batch = store._write_batch
+    attempts = []
+
+    def failing_write_batch(rows, expire_before):
+        attempts.append(time.monotonic())
+        if len(attempts) <= 3:
+            raise sqlite3.OperationalError('database is locked')
+        return write_batch(rows, expire_before)
+
+    monkeypatch.setattr(store, '_write_batch', failing_write_batch)
+
+    task = make_task('task-1')
+    store.put(task)
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if len(attempts) > 3 and not store.metrics()['dirty_entries']:
+            break
+
+    assert len(attempts) == 4
+    # Each retry waits about twice as long as the one before.
+    delays = [b - a for a, b in zip(attempts, attempts[1:])]
+    assert delays[1] > delays[0] * 1.5
+    assert delays[2] > delays[1] * 1.5
+    other = SQLiteTaskStore(path)
+    stored = other.get('task-1')
+    assert stored.status == task.status
+    assert stored.history == task.history
+    other.close()
+    store.close()
+
+
+async def test_exclusive_store_trusts_its_cache(path):
+    store = SQLiteTaskStore(path, exclusive=True)
+    shared = SQLiteTaskStore(path)
+    store.put(make_task('task-1'))
+    store.flush()
+    shared.put(make_task('task-1'))
+    store.get('task-1')
+    shared.put(make_task('task-1', 'written by another process'))
+    shared.flush()
+
+    assert store.get('task-1').history[0].parts[0].text == 'hello'
+    store.exclusive = False
+    assert store.get('task-1').history[0].parts[0].text == (
+        'written by another process'
+    )
+    shared.close()
+    store.close()
+
+
+def test_forked_store_is_no_longer_exclusive(path):
+    store = SQLiteTaskStore(path, exclusive=True)
+
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0 if not store.exclusive else 1)
+    _, status = os.waitpid(pid, 0)
+
+    assert os.waitstatus_to_exitcode(status) == 0
+    assert not store.exclusive
+    store.close()